@@ -0,0 +1,238 @@
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import tempfile
+import numpy as np
+from frame_generator import make_stream, MIN_FRAME_LEN
+from sixtisch_blocks.crc import crc16, crc16_batch
+from sixtisch_blocks.console import configure_console
+from sixtisch_blocks.db_writer import DBWriter, get_writer
+from sixtisch_blocks.decoder import FrameDecoder
+from sixtisch_blocks.decoder_pool import configure_decoder_pool, get_decoder_pool
+from sixtisch_blocks.dedup import get_correlator
+from sixtisch_blocks.stats import SegmenterStats
+from sixtisch_blocks.storage import table_name, insert_sql, init_table, text_row
+
+CHUNK_BITS = 4096
+HIGHER_IS_BETTER = ("_per_s",)
+
+
+class BenchChannel:
+    # What PacketSegmenterSink does per channel without GNU Radio: FrameDecoder.search() in work(),
+    # then parsing in the decoder pool and _save_to_db()'s dedup and DB insert.
+    def __init__(self, channel, db, max_frame_len):
+        self.channel = channel
+        self.stats = SegmenterStats()
+        self.core = FrameDecoder(max_frame_len=max_frame_len, stats=self.stats)
+        self.db = db
+        self.table_name = table_name(channel)
+        self.insert_sql = insert_sql(self.table_name)
+        init_table(db, self.table_name, "text")
+        self.correlator = get_correlator()
+        self.decoder = get_decoder_pool()
+        self.decoder_lane = self.decoder.register()
+        self.packet_count = 0
+        self.save_time = 0.0
+
+    def work(self, chunk):
+        for frame in self.core.search(chunk):
+            self.decoder.submit(self.decoder_lane, self.save, frame)
+
+    def save(self, record):
+        t0 = time.perf_counter()
+        self.stats.frames += 1
+        if record.crc_ok:
+            self.stats.crc_pass += 1
+        else:
+            self.stats.crc_fail += 1
+        packet_duration_ms = (self.core.frame_bits(len(record.payload)) / self.core.bitrate) * 1000
+        self.packet_count += 1
+        copy = self.correlator.classify(self.channel, record)
+        if not self.correlator.suppress(copy):
+            self.db.put(self.insert_sql, text_row(record, packet_duration_ms, self.core.sfd_width, copy))
+        self.save_time += time.perf_counter() - t0
+
+
+def _feed(channels, streams, chunk_bits=CHUNK_BITS):
+    longest = max(len(s) for s in streams)
+    for start in range(0, longest, chunk_bits):
+        for channel, stream in zip(channels, streams):
+            chunk = stream[start:start+chunk_bits]
+            if len(chunk):
+                channel.work(chunk)
+
+
+def bench_segmenter(streams, db_path, max_frame_len):
+    db = get_writer(db_path)
+    channels = [BenchChannel(f"bench_{i}", db, max_frame_len) for i in range(len(streams))]
+
+    t0 = time.perf_counter()
+    _feed(channels, streams)
+    work_time = time.perf_counter() - t0
+    channels[0].decoder.flush()
+    total = time.perf_counter() - t0
+    db.flush()
+    save_time = sum(channel.save_time for channel in channels)
+
+    bits = sum(len(s) for s in streams)
+    frames = sum(channel.packet_count for channel in channels)
+    return {
+        "channels": len(streams),
+        "bits": bits,
+        "frames": frames,
+        "crc_pass": sum(channel.stats.crc_pass for channel in channels),
+        "phr_rejects": sum(channel.stats.phr_rejects for channel in channels),
+        "superseded": sum(channel.stats.superseded for channel in channels),
+        "work_s": work_time,
+        "save_s": save_time,
+        "total_s": total,
+        "work_bits_per_s": bits / work_time,
+        "save_frames_per_s": frames / save_time if save_time else 0.0,
+        "total_bits_per_s": bits / total,
+        "total_frames_per_s": frames / total,
+    }
+
+
+def bench_crc(frames, repeat=5):
+    data = [f[2:-2] for f in frames]
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        for d in data:
+            crc16(d)
+    single = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        crc16_batch(data)
+    batch = time.perf_counter() - t0
+    n = len(data) * repeat
+    return {"frames": n, "crc_frames_per_s": n / single, "crc_batch_frames_per_s": n / batch}
+
+
+def bench_db_insert(db_path, n_rows, batch_size):
+    writer = DBWriter(db_path, batch_size=batch_size, max_queue=n_rows + 1, policy="block")
+    writer.put("CREATE TABLE IF NOT EXISTS bench_insert (Timestamp_ns INTEGER, PSDU TEXT, CRC_Check INTEGER, PacketDuration_ms REAL)")
+    row = (1_767_225_600_000_000_000, "00" * 64, 1, 12.0)
+    sql = "INSERT INTO bench_insert VALUES (?,?,?,?)"
+    t0 = time.perf_counter()
+    for _ in range(n_rows):
+        writer.put(sql, row)
+    writer.flush()
+    elapsed = time.perf_counter() - t0
+    writer.close()
+    return {"rows": n_rows, "batch_size": batch_size, "db_rows_per_s": n_rows / elapsed}
+
+
+def run(args):
+    results = {
+        "meta": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "machine": platform.machine(),
+            "frames_per_channel": args.frames,
+            "density": args.density,
+            "ber": args.ber,
+            "false_sync_rate": args.false_sync_rate,
+            "decoder_mode": args.decoder_mode,
+            "decoder_workers": args.decoder_workers,
+        },
+        "crc": None,
+        "db_insert": None,
+        "segmenter": {},
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        streams = []
+        all_frames = []
+        for ch in range(max(args.channels)):
+            stream, frames = make_stream(args.frames, args.density, args.ber, args.false_sync_rate,
+                                         seed=args.seed + ch, max_frame_len=args.max_frame_len)
+            streams.append(stream)
+            all_frames.extend(frames)
+        results["crc"] = bench_crc(all_frames)
+        results["db_insert"] = bench_db_insert(os.path.join(tmp, "insert.db"), args.db_rows, args.db_batch)
+        for n in args.channels:
+            db_path = os.path.join(tmp, f"segmenter_{n}.db")
+            r = bench_segmenter(streams[:n], db_path, args.max_frame_len)
+            r["frames_expected"] = args.frames * n
+            results["segmenter"][str(n)] = r
+    return results
+
+
+def _flatten(d, prefix=""):
+    for k, v in d.items():
+        key = f"{prefix}{k}"
+        if isinstance(v, dict):
+            yield from _flatten(v, key + ".")
+        else:
+            yield key, v
+
+
+def compare(results, baseline, tolerance):
+    current = dict(_flatten({k: v for k, v in results.items() if k != "meta"}))
+    regressions = []
+    for key, base in _flatten({k: v for k, v in baseline.items() if k != "meta"}):
+        if not key.endswith(HIGHER_IS_BETTER) or key not in current or not base:
+            continue
+        ratio = current[key] / base
+        status = "REGRESSION" if ratio < 1 - tolerance else "ok"
+        print(f"{key:45} {base:14,.0f} -> {current[key]:14,.0f}  {ratio:6.2f}x  {status}")
+        if status != "ok":
+            regressions.append(key)
+    return regressions
+
+
+def print_results(results):
+    crc = results["crc"]
+    db = results["db_insert"]
+    print(f"CRC-16: {crc['crc_frames_per_s']:,.0f} frames/s single, {crc['crc_batch_frames_per_s']:,.0f} frames/s batch")
+    print(f"DB insert: {db['db_rows_per_s']:,.0f} rows/s (batch {db['batch_size']})")
+    print(f"{'Channels':>8} | {'Frames':>13} | {'CRC ok':>6} | {'PHR rej':>7} | {'Supers.':>7} | "
+          f"{'work() bit/s':>14} | {'save frame/s':>13} | {'total bit/s':>14}")
+    print("-"*104)
+    for n, r in results["segmenter"].items():
+        print(f"{n:>8} | {r['frames']:>6}/{r['frames_expected']:<6} | {r['crc_pass']:>6} | {r['phr_rejects']:>7} | "
+              f"{r['superseded']:>7} | {r['work_bits_per_s']:>14,.0f} | {r['save_frames_per_s']:>13,.0f} | "
+              f"{r['total_bits_per_s']:>14,.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="6TiSCH Packet Sniffer - PacketSegmenter benchmark")
+    parser.add_argument("--frames", type=int, default=2000, help="Frames per channel")
+    parser.add_argument("--channels", type=int, nargs="+", default=[1, 3, 5], help="Channel counts to run")
+    parser.add_argument("--density", type=float, default=0.5, help="Fraction of airtime occupied by frames")
+    parser.add_argument("--ber", type=float, default=0.0, help="Bit error rate applied to the stream")
+    parser.add_argument("--false-sync-rate", type=float, default=0.0,
+                        help="Probability of a bogus sync word before each frame")
+    parser.add_argument("--max-frame-len", type=int, default=127)
+    parser.add_argument("--db-rows", type=int, default=20000)
+    parser.add_argument("--db-batch", type=int, default=256)
+    parser.add_argument("--decoder-mode", choices=["thread", "process"], default="thread")
+    parser.add_argument("--decoder-workers", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-o", "--output", help="Write results as JSON to this file")
+    parser.add_argument("--baseline", help="Compare against a stored JSON result")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="Allowed relative slowdown against the baseline")
+    args = parser.parse_args()
+    if not MIN_FRAME_LEN <= args.max_frame_len <= 127:
+        parser.error(f"--max-frame-len must be between {MIN_FRAME_LEN} and 127")
+
+    configure_console(mode="silent")
+    configure_decoder_pool(mode=args.decoder_mode, workers=args.decoder_workers, policy="block")
+    results = run(args)
+    print_results(results)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        print()
+        if compare(results, baseline, args.tolerance):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+import numpy as np
+from sixtisch_blocks.crc import crc16
+
+SYNC_WORD = '1001000001001110'
+SYNC_BITS = np.array([int(b) for b in SYNC_WORD], dtype=np.uint8)
+
+FRAME_BEACON = 0
+FRAME_DATA = 1
+FRAME_ACK = 2
+FRAME_MAC_COMMAND = 3
+
+ADDR_NONE = 0
+ADDR_SHORT = 2
+ADDR_LONG = 3
+
+_ADDR_LEN = {ADDR_NONE: 0, ADDR_SHORT: 2, ADDR_LONG: 8}
+# FCF, sequence number, PAN ID and two short addresses.
+MIN_FRAME_LEN = 9
+
+
+def make_psdu(rng, frame_type=FRAME_DATA, dest_mode=ADDR_SHORT, src_mode=ADDR_LONG,
+              ack_request=0, seq=None, pan_id=0xE3BE, payload_len=None, max_frame_len=127):
+    # Long addresses that would not fit in max_frame_len fall back to short ones.
+    if 5 + _ADDR_LEN[dest_mode] + _ADDR_LEN[src_mode] > max_frame_len:
+        dest_mode = min(dest_mode, ADDR_SHORT)
+        src_mode = min(src_mode, ADDR_SHORT)
+    fcf = frame_type | (ack_request << 5) | (1 << 6) | (dest_mode << 10) | (2 << 12) | (src_mode << 14)
+    seq = int(rng.integers(256)) if seq is None else seq
+    header = fcf.to_bytes(2, 'little') + bytes([seq]) + pan_id.to_bytes(2, 'little')
+    header += rng.integers(0, 256, _ADDR_LEN[dest_mode], dtype=np.uint8).tobytes()
+    header += rng.integers(0, 256, _ADDR_LEN[src_mode], dtype=np.uint8).tobytes()
+    room = max(0, max_frame_len - len(header))
+    if payload_len is None:
+        payload_len = int(rng.integers(0, room + 1))
+    return header + rng.integers(0, 256, min(payload_len, room), dtype=np.uint8).tobytes()
+
+
+def make_frame(psdu, sync_word=SYNC_WORD):
+    crc = crc16(bytes([len(psdu)]) + psdu)
+    sfd = int(sync_word, 2).to_bytes(len(sync_word) // 8, 'big')
+    return sfd + bytes([len(psdu)]) + psdu + crc.to_bytes(2, 'big')
+
+
+def to_bits(data):
+    return np.unpackbits(np.frombuffer(data, dtype=np.uint8))
+
+
+def random_frame(rng, max_frame_len=127):
+    dest_mode = ADDR_SHORT if rng.random() < 0.5 else ADDR_LONG
+    src_mode = ADDR_SHORT if rng.random() < 0.5 else ADDR_LONG
+    frame_type = int(rng.choice([FRAME_BEACON, FRAME_DATA, FRAME_DATA, FRAME_DATA, FRAME_MAC_COMMAND]))
+    return make_frame(make_psdu(rng, frame_type, dest_mode, src_mode, max_frame_len=max_frame_len))
+
+
+def false_sync(rng):
+    junk = rng.integers(0, 2, int(rng.integers(8, 64)), dtype=np.uint8)
+    return np.concatenate((SYNC_BITS, junk))
+
+
+def make_stream(n_frames, density=0.5, ber=0.0, false_sync_rate=0.0, seed=0, max_frame_len=127):
+    rng = np.random.default_rng(seed)
+    parts = []
+    frames = []
+    for _ in range(n_frames):
+        frame = random_frame(rng, max_frame_len)
+        bits = to_bits(frame)
+        gap = int(rng.exponential(len(bits) * (1 - density) / density)) if density < 1 else 0
+        parts.append(rng.integers(0, 2, gap, dtype=np.uint8))
+        if rng.random() < false_sync_rate:
+            parts.append(false_sync(rng))
+        parts.append(bits)
+        frames.append(frame)
+    parts.append(rng.integers(0, 2, 64, dtype=np.uint8))
+    stream = np.concatenate(parts)
+    if ber > 0:
+        stream ^= (rng.random(len(stream)) < ber).astype(np.uint8)
+    return stream, frames
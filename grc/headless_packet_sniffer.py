@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+#
+# SPDX-License-Identifier: GPL-3.0
+#
+# GNU Radio Python Flow Graph
+# Title: 6TiSCH Packet Sniffer (headless)
+# Author: Konrad Włodarczyk
+# GNU Radio version: 3.10.12.0
+
+from gnuradio import gr
+from gnuradio import soapy
+from sixtisch_blocks.demod_chain import FSKDemodChain
+from sixtisch_blocks.packet_segmenter import PacketSegmenterSink, DB_PATH
+
+
+class headless_packet_sniffer(gr.top_block):
+
+    def __init__(self, db_path=DB_PATH, pcap_path=""):
+        gr.top_block.__init__(self, "6TiSCH Packet Sniffer (headless)", catch_exceptions=True)
+
+        ##################################################
+        # Variables
+        ##################################################
+        self.samp_rate = samp_rate = 2e6
+        self.bitrate = bitrate = 50e3
+        self.center_freq = center_freq = 864e6
+        self.channel_freq = channel_freq = 863.1e6
+
+        ##################################################
+        # Blocks
+        ##################################################
+
+        self.soapy_limesdr_source_0 = None
+        dev = 'driver=lime'
+        stream_args = ''
+        tune_args = ['']
+        settings = ['']
+
+        self.soapy_limesdr_source_0 = soapy.source(dev, "fc32", 1, '',
+                                  stream_args, tune_args, settings)
+        self.soapy_limesdr_source_0.set_sample_rate(0, samp_rate)
+        self.soapy_limesdr_source_0.set_bandwidth(0, 0.0)
+        self.soapy_limesdr_source_0.set_frequency(0, center_freq)
+        self.soapy_limesdr_source_0.set_frequency_correction(0, 0)
+        self.soapy_limesdr_source_0.set_gain(0, min(max(20, -12.0), 61.0))
+        self.fsk_demod_chain_0 = FSKDemodChain(samp_rate, bitrate, channel_freq - center_freq)
+        self.packet_segmenter_0 = PacketSegmenterSink('1001000001001110', 'Sync Word', 0, '863.1MHz', 127, db_path, pcap_path=pcap_path)
+
+        ##################################################
+        # Connections
+        ##################################################
+        self.connect((self.soapy_limesdr_source_0, 0), (self.fsk_demod_chain_0, 0))
+        self.connect((self.fsk_demod_chain_0, 0), (self.packet_segmenter_0, 0))
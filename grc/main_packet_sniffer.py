@@ -28,6 +28,7 @@ from gnuradio import eng_notation
 from gnuradio import soapy
 from gnuradio.ctrlport.monitor import *
 from sixtisch_blocks.packet_segmenter import PacketSegmenter
+from sixtisch_blocks.squelch_gate import SquelchGate
 import sip
 import threading
 
@@ -79,6 +80,7 @@ class main_packet_sniffer(gr.top_block, Qt.QWidget):
         # Blocks
         ##################################################
 
+        self.squelch_gate_0 = SquelchGate(samp_rate, (-30), True, '')
         self.soapy_limesdr_source_0 = None
         dev = 'driver=lime'
         stream_args = ''
@@ -148,21 +150,20 @@ class main_packet_sniffer(gr.top_block, Qt.QWidget):
         self.blocks_moving_average_xx_0 = blocks.moving_average_ff(15, 1, 4000, 1)
         self.blocks_ctrlport_monitor_0 = not True or monitor()
         self.analog_quadrature_demod_cf_1 = analog.quadrature_demod_cf(25)
-        self.analog_pwr_squelch_xx_0 = analog.pwr_squelch_cc((-30), 1, 0, True)
 
 
         ##################################################
         # Connections
         ##################################################
-        self.connect((self.analog_pwr_squelch_xx_0, 0), (self.analog_quadrature_demod_cf_1, 0))
         self.connect((self.analog_quadrature_demod_cf_1, 0), (self.blocks_moving_average_xx_0, 0))
         self.connect((self.blocks_moving_average_xx_0, 0), (self.digital_clock_recovery_mm_xx_0, 0))
         self.connect((self.blocks_uchar_to_float_0_0, 0), (self.qtgui_time_sink_x_0_0, 0))
         self.connect((self.digital_binary_slicer_fb_0, 0), (self.packet_segmenter_0, 0))
         self.connect((self.digital_clock_recovery_mm_xx_0, 0), (self.digital_binary_slicer_fb_0, 0))
-        self.connect((self.freq_xlating_fir_filter_xxx_0, 0), (self.analog_pwr_squelch_xx_0, 0))
+        self.connect((self.freq_xlating_fir_filter_xxx_0, 0), (self.squelch_gate_0, 0))
         self.connect((self.packet_segmenter_0, 0), (self.blocks_uchar_to_float_0_0, 0))
         self.connect((self.soapy_limesdr_source_0, 0), (self.freq_xlating_fir_filter_xxx_0, 0))
+        self.connect((self.squelch_gate_0, 0), (self.analog_quadrature_demod_cf_1, 0))
 
 
     def closeEvent(self, event):
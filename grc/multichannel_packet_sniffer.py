@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+#
+# SPDX-License-Identifier: GPL-3.0
+#
+# GNU Radio Python Flow Graph
+# Title: 6TiSCH Packet Sniffer (multi-channel)
+# Author: Konrad Włodarczyk
+# GNU Radio version: 3.10.12.0
+
+from gnuradio import blocks
+from gnuradio import gr
+from gnuradio.filter import firdes
+from gnuradio.filter import pfb
+from gnuradio.fft import window
+from sixtisch_blocks.channel_plan import ChannelPlan
+from sixtisch_blocks.demod_chain import FSKDemodChain
+from sixtisch_blocks.packet_segmenter import PacketSegmenterSink, DB_PATH
+from sixtisch_blocks.stats import register_source
+from sixtisch_blocks.tsch import ChannelTracker
+
+
+class multichannel_packet_sniffer(gr.top_block):
+
+    def __init__(self, center_freq=863.3e6, channel_spacing=200e3, n_channels=3, samp_rate=2e6,
+                 avoid_dc=False, iq_path=None, db_path=DB_PATH, follow_schedule=False, hopping_sequence=None,
+                 slot_duration_us=None, pcap_path="", first_channel=0):
+        gr.top_block.__init__(self, "6TiSCH Packet Sniffer (multi-channel)", catch_exceptions=True)
+
+        ##################################################
+        # Variables
+        ##################################################
+        self.plan = plan = ChannelPlan(center_freq, channel_spacing, n_channels, samp_rate, avoid_dc, first_channel)
+        self.samp_rate = samp_rate
+        self.bitrate = bitrate = 50e3
+        self.oversample_rate = oversample_rate = 2
+        self.channel_rate = channel_rate = channel_spacing * oversample_rate
+        self.taps = taps = firdes.low_pass(1.0, samp_rate, 85e3, 15e3, window.WIN_HAMMING)
+
+        ##################################################
+        # Blocks
+        ##################################################
+        if iq_path:
+            self.iq_source_0 = blocks.file_source(gr.sizeof_gr_complex, iq_path, False, 0, 0)
+        else:
+            from gnuradio import soapy
+            dev = 'driver=lime'
+            stream_args = ''
+            tune_args = ['']
+            settings = ['']
+
+            self.iq_source_0 = soapy.source(dev, "fc32", 1, '',
+                                      stream_args, tune_args, settings)
+            self.iq_source_0.set_sample_rate(0, samp_rate)
+            self.iq_source_0.set_bandwidth(0, 0.0)
+            self.iq_source_0.set_frequency(0, plan.tune_freq)
+            self.iq_source_0.set_frequency_correction(0, 0)
+            self.iq_source_0.set_gain(0, min(max(20, -12.0), 61.0))
+        self.pfb_channelizer_0 = pfb.channelizer_ccf(plan.n_bins, taps, oversample_rate, 100)
+
+        self.tracker = None
+        if follow_schedule:
+            self.tracker = ChannelTracker(n_channels, hopping_sequence, slot_duration_us,
+                                          channel_index=plan.channel_index)
+        self.fsk_demod_chains = []
+        self.packet_segmenters = []
+        for ch in range(n_channels):
+            # The squelch of each chain also drops the samples of slots the tracker predicts no
+            # traffic in, so the demodulator and segmenter of an idle channel do no work.
+            schedule = None
+            if follow_schedule:
+                schedule = lambda start_ns, end_ns, ch=ch: self.tracker.receive_spans(ch, start_ns, end_ns)
+            self.fsk_demod_chains.append(FSKDemodChain(channel_rate, bitrate, None, time_base='channelizer',
+                                                       schedule=schedule))
+            self.packet_segmenters.append(
+                PacketSegmenterSink('1001000001001110', 'Sync Word', 0, plan.channel_name(ch), 127, db_path,
+                                    pcap_path=pcap_path, time_base='channelizer'))
+            if follow_schedule:
+                self.packet_segmenters[ch].add_listener(lambda _, record, ch=ch: self.tracker.observe(ch, record))
+        self.blocks_null_sink_0 = blocks.null_sink(gr.sizeof_gr_complex)
+
+        ##################################################
+        # Connections
+        ##################################################
+        self.connect((self.iq_source_0, 0), (self.pfb_channelizer_0, 0))
+        for ch in range(n_channels):
+            self.connect((self.pfb_channelizer_0, plan.bin_index(ch)), (self.fsk_demod_chains[ch], 0))
+            self.connect((self.fsk_demod_chains[ch], 0), (self.packet_segmenters[ch], 0))
+        used_bins = {plan.bin_index(ch) for ch in range(n_channels)}
+        unused_bins = [b for b in range(plan.n_bins) if b not in used_bins]
+        for port, b in enumerate(unused_bins):
+            self.connect((self.pfb_channelizer_0, b), (self.blocks_null_sink_0, port))
+
+        ##################################################
+        # Schedule following
+        ##################################################
+        if follow_schedule:
+            register_source("tsch", lambda: {**self.tracker.get_stats(),
+                                             "squelch": [chain.squelch.get_stats() for chain in self.fsk_demod_chains]})
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+#
+# SPDX-License-Identifier: GPL-3.0
+#
+# GNU Radio Python Flow Graph
+# Title: 6TiSCH Packet Sniffer (offline replay)
+# Author: Konrad Włodarczyk
+# GNU Radio version: 3.10.12.0
+
+from gnuradio import blocks
+from gnuradio import gr
+from sixtisch_blocks.demod_chain import FSKDemodChain
+from sixtisch_blocks.iq_source import MmapIQSource
+from sixtisch_blocks.packet_segmenter import PacketSegmenterSink, DB_PATH
+
+
+class replay_packet_sniffer(gr.top_block):
+
+    def __init__(self, iq_path, samp_rate=2e6, center_freq=864e6, channel_freq=863.1e6,
+                 use_mmap=False, realtime=False, db_path=DB_PATH, pcap_path=""):
+        gr.top_block.__init__(self, "6TiSCH Packet Sniffer (offline replay)", catch_exceptions=True)
+
+        ##################################################
+        # Variables
+        ##################################################
+        self.samp_rate = samp_rate
+        self.bitrate = bitrate = 50e3
+        self.center_freq = center_freq
+        self.channel_freq = channel_freq
+        self.channel = channel = f"{channel_freq / 1e6:g}MHz"
+
+        ##################################################
+        # Blocks
+        ##################################################
+        if use_mmap:
+            self.iq_source_0 = MmapIQSource(iq_path)
+        else:
+            self.iq_source_0 = blocks.file_source(gr.sizeof_gr_complex, iq_path, False, 0, 0)
+        self.fsk_demod_chain_0 = FSKDemodChain(samp_rate, bitrate, channel_freq - center_freq)
+        self.packet_segmenter_0 = PacketSegmenterSink('1001000001001110', 'Sync Word', 0, channel, 127, db_path, pcap_path=pcap_path)
+
+        ##################################################
+        # Connections
+        ##################################################
+        if realtime:
+            self.blocks_throttle_0 = blocks.throttle(gr.sizeof_gr_complex, samp_rate, True)
+            self.connect((self.iq_source_0, 0), (self.blocks_throttle_0, 0))
+            self.connect((self.blocks_throttle_0, 0), (self.fsk_demod_chain_0, 0))
+        else:
+            self.connect((self.iq_source_0, 0), (self.fsk_demod_chain_0, 0))
+        self.connect((self.fsk_demod_chain_0, 0), (self.packet_segmenter_0, 0))
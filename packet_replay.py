@@ -0,0 +1,59 @@
+import os
+import signal
+import time
+import argparse
+from grc.replay_packet_sniffer import replay_packet_sniffer
+from sixtisch_blocks.cli import add_runtime_args, apply_runtime_args
+from sixtisch_blocks.console import PACKET_HEADER
+from sixtisch_blocks.packet_segmenter import DB_PATH
+
+
+def main():
+    parser = argparse.ArgumentParser(description="6TiSCH Packet Sniffer - offline IQ replay")
+    parser.add_argument("iq_file", help="Recorded IQ capture (interleaved fc32)")
+    parser.add_argument("--samp-rate", type=float, default=2e6,
+                        help="Sample rate of the capture in Hz")
+    parser.add_argument("--center-freq", type=float, default=864e6,
+                        help="Center frequency of the capture in Hz")
+    parser.add_argument("--channel-freq", type=float, default=863.1e6,
+                        help="Channel to decode in Hz")
+    parser.add_argument("--db", default=DB_PATH,
+                        help="SQLite database to write decoded packets to")
+    parser.add_argument("--pcap", action="store_true",
+                        help="Also write decoded frames to a pcap file next to the database")
+    parser.add_argument("--mmap", action="store_true",
+                        help="Memory-map the capture instead of streaming it from disk")
+    parser.add_argument("--realtime", action="store_true",
+                        help="Throttle replay to the capture sample rate")
+    add_runtime_args(parser)
+    args = parser.parse_args()
+    apply_runtime_args(args)
+    pcap_path = os.path.splitext(args.db)[0] + ".pcap" if args.pcap else ""
+
+    n_samples = os.path.getsize(args.iq_file) // 8
+    tb = replay_packet_sniffer(args.iq_file, args.samp_rate, args.center_freq, args.channel_freq,
+                               args.mmap, args.realtime, args.db, pcap_path)
+
+    def stop_tb(*args):
+        print("\nStopping replay...")
+        tb.stop()
+
+    signal.signal(signal.SIGINT, stop_tb)
+    signal.signal(signal.SIGTERM, stop_tb)
+
+    print(f"Replaying {n_samples} samples from {args.iq_file}\n")
+    if args.console == "packet":
+        print(PACKET_HEADER)
+        print("-"*110)
+    start = time.perf_counter()
+    tb.start()
+    tb.wait()
+    elapsed = time.perf_counter() - start
+
+    print(f"\nProcessed {n_samples} samples in {elapsed:.2f} s "
+          f"({n_samples / elapsed:,.0f} samples/s, {n_samples / elapsed / args.samp_rate:.1f}x realtime)")
+    print(f"Decoded packets written to: {args.db}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,48 +1,130 @@
+import os
 import sys
 import signal
 import argparse
-from PyQt5 import Qt
-from grc.main_packet_sniffer import main_packet_sniffer
+import threading
+from sixtisch_blocks.cli import add_runtime_args, apply_runtime_args
+from sixtisch_blocks.console import PACKET_HEADER
+from sixtisch_blocks.packet_segmenter import DB_PATH
 
 
-def main():
-    parser = argparse.ArgumentParser(description="6TiSCH Packet Sniffer")
-    parser.add_argument("-t", "--time", type=float, default=0,
-                        help="Runtime in minutes (0 = run until Ctrl+C)")
-    args = parser.parse_args()
+def print_banner(args):
+    print("\n---------------------------------")
+    print("6TiSCH Packet Sniffer Application")
+    print("---------------------------------\n")
+    print("Packet sniffer started\n")
+    if args.console == "packet":
+        print(PACKET_HEADER)
+        print("-"*110)
+
+
+def output_paths(args):
+    db_path = os.path.join(args.output_dir, "capture.db") if args.output_dir else DB_PATH
+    pcap_path = os.path.splitext(db_path)[0] + ".pcap" if args.pcap else ""
+    return db_path, pcap_path
+
+
+def stop_tb(tb, args):
+    print("\nStopping packet sniffer...")
+    tb.stop()
+    tb.wait()
+    db_path, _ = output_paths(args)
+    if args.rotate_minutes or args.rotate_mb or args.retention_gb:
+        db_path = os.path.splitext(db_path)[0] + ".manifest.json"
+    print(f"Full sniffing report available at: {db_path}")
+    print("Packet sniffer stopped.")
+
+
+def run_headless(args):
+    db_path, pcap_path = output_paths(args)
+    if args.channels > 1:
+        from grc.multichannel_packet_sniffer import multichannel_packet_sniffer
+        tb = multichannel_packet_sniffer(args.center_freq, args.channel_spacing, args.channels,
+                                         args.samp_rate, args.avoid_dc, follow_schedule=args.follow_schedule,
+                                         hopping_sequence=args.hopping_sequence,
+                                         slot_duration_us=args.slot_duration_ms and args.slot_duration_ms * 1000,
+                                         db_path=db_path, pcap_path=pcap_path, first_channel=args.first_channel)
+        print("Channels: " + ", ".join(tb.plan.channel_names()))
+    else:
+        from grc.headless_packet_sniffer import headless_packet_sniffer
+        tb = headless_packet_sniffer(db_path, pcap_path)
+    stop_event = threading.Event()
+
+    signal.signal(signal.SIGINT, lambda *args: stop_event.set())
+    signal.signal(signal.SIGTERM, lambda *args: stop_event.set())
+
+    tb.start()
+    print_banner(args)
+    stop_event.wait(args.time * 60 if args.time > 0 else None)
+    stop_tb(tb, args)
+
+
+def run_gui(args):
+    from PyQt5 import Qt
+    from grc.main_packet_sniffer import main_packet_sniffer
 
     qapp = Qt.QApplication(sys.argv)
 
     tb = main_packet_sniffer()
     tb.start()
+    print_banner(args)
 
-    print("\n---------------------------------")
-    print("6TiSCH Packet Sniffer Application")
-    print("---------------------------------\n")
-    print("Packet sniffer started\n")
-    print(f"{'Timestamp':26} | {'Frame Type':12} | {'CRC':8} | {'Seq':4} | {'Dest Addr':17} | {'Src Addr':17} | {'PAN ID':6}")
-    print("-"*110)
-
-    def stop_tb(*args):
-        print("\nStopping packet sniffer...")
-        tb.stop()
-        tb.wait()
-        print("Full sniffing report available at: 6TiSCH-packet-sniffer/data/Database.db")
-        print("Packet sniffer stopped.")
+    def stop_gui(*_):
+        stop_tb(tb, args)
         Qt.QApplication.quit()
 
-    signal.signal(signal.SIGINT, lambda *args: stop_tb())
-    signal.signal(signal.SIGTERM, lambda *args: stop_tb())
+    signal.signal(signal.SIGINT, lambda *args: stop_gui())
+    signal.signal(signal.SIGTERM, lambda *args: stop_gui())
 
     timer = Qt.QTimer()
     timer.start(500)
     timer.timeout.connect(lambda: None)
 
     if args.time > 0:
-        Qt.QTimer.singleShot(int(args.time * 60 * 1000), stop_tb)
+        Qt.QTimer.singleShot(int(args.time * 60 * 1000), stop_gui)
 
     tb.show()
     qapp.exec_()
 
+
+def main():
+    parser = argparse.ArgumentParser(description="6TiSCH Packet Sniffer")
+    parser.add_argument("-t", "--time", type=float, default=0,
+                        help="Runtime in minutes (0 = run until Ctrl+C)")
+    parser.add_argument("--headless", action="store_true",
+                        help="Run without the Qt GUI and debug time sink")
+    parser.add_argument("-n", "--channels", type=int, default=1,
+                        help="Number of channels to decode through a polyphase channelizer (implies --headless)")
+    parser.add_argument("--center-freq", type=float, default=863.3e6,
+                        help="Center of the channel set in Hz (multi-channel mode)")
+    parser.add_argument("--channel-spacing", type=float, default=200e3,
+                        help="Channel spacing in Hz (multi-channel mode)")
+    parser.add_argument("--samp-rate", type=float, default=2e6,
+                        help="SDR sample rate in Hz, a multiple of the channel spacing (multi-channel mode)")
+    parser.add_argument("--avoid-dc", action="store_true",
+                        help="Tune below the channel set so no channel sits on the DC spike (multi-channel mode)")
+    parser.add_argument("--follow-schedule", action="store_true",
+                        help="Track the TSCH schedule from Enhanced Beacons and skip demodulating channels in slots with no predicted traffic (multi-channel mode)")
+    parser.add_argument("--hopping-sequence", type=int, nargs="+",
+                        help="TSCH hopping sequence as channel indices (default: learned from Enhanced Beacons)")
+    parser.add_argument("--first-channel", type=int, default=0,
+                        help="802.15.4 channel number of the lowest channel, to map the Channel Hopping IE onto the channel set")
+    parser.add_argument("--slot-duration-ms", type=float,
+                        help="TSCH timeslot length when the Enhanced Beacons only carry a template ID (default: 10 ms)")
+    parser.add_argument("--output-dir",
+                        help="Directory for the capture database (capture.db) and pcap (default: the configured DB_PATH, requires --headless)")
+    parser.add_argument("--pcap", action="store_true",
+                        help="Also write decoded frames to a pcap file next to the database (requires --headless)")
+    add_runtime_args(parser)
+    args = parser.parse_args()
+    if not (args.headless or args.channels > 1) and (args.output_dir or args.pcap):
+        parser.error("--output-dir and --pcap require --headless")
+    apply_runtime_args(args)
+
+    if args.headless or args.channels > 1:
+        run_headless(args)
+    else:
+        run_gui(args)
+
 if __name__=="__main__":
     main()
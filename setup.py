@@ -7,5 +7,11 @@ setup(
 	packages=find_packages(where="src"),
 	package_dir={"": "src"},
         include_package_data=True,
+	entry_points={
+		"console_scripts": [
+			"sixtisch-decode=sixtisch_blocks.decode:main",
+			"sixtisch-analyze=sixtisch_blocks.analyze:main",
+		],
+	},
 	#install_requires=["gnuradio"],
 )
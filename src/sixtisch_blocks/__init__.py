@@ -1,2 +1,13 @@
-from .packet_segmenter import PacketSegmenter
-__all__ = ["PacketSegmenter"]
+from .decoder import FrameDecoder, decode_bits
+from .frame_parser import FrameRecord, parse_frame
+
+_GR_BLOCKS = ("PacketSegmenter", "PacketSegmenterSink", "PacketSegmenterTagged")
+__all__ = ["FrameDecoder", "decode_bits", "FrameRecord", "parse_frame", *_GR_BLOCKS]
+
+
+def __getattr__(name):
+    # The GNU Radio blocks are only imported on first use so the decoder core works without gnuradio.
+    if name in _GR_BLOCKS:
+        from . import packet_segmenter
+        return getattr(packet_segmenter, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,371 @@
+import os
+import re
+import sys
+import json
+import time
+import sqlite3
+import argparse
+import numpy as np
+from datetime import datetime
+from .frame_parser import FRAME_TYPE_NAMES
+from .storage import table_name
+
+FRAME_TYPE_CODES = {name: code for code, name in FRAME_TYPE_NAMES.items()}
+FRAME_TYPE_ACK = 2
+MAX_SEQ_GAP = 128
+PERCENTILES = (5, 25, 50, 75, 95)
+# Matches packet tables and the packets_<channel>_<unix time> copies kept by init_table.
+TABLE_RE = re.compile(r"packets_(.+?)(?:_\d{10})?$")
+# Channel plan names as table_name() writes them, e.g. 863_1MHz for 863.1MHz.
+TABLE_MHZ_RE = re.compile(r"(\d+)_(\d+)MHz")
+
+
+class Frames:
+    # Columnar view of the packet tables of one or more capture databases. file, channel and node
+    # index into files, channels and nodes; -1 marks a missing frame type, node or sequence number.
+    # Channels are told apart by their table name, so a channel keeps one entry whether its name came
+    # from sniff_summary or had to be recovered from the table name of a legacy database.
+    COLUMNS = ("time_ns", "file", "channel", "frame_type", "node", "seq", "crc_ok", "duration_ms")
+
+    def __init__(self):
+        self.files = []
+        self.channels = []
+        self.nodes = []
+        self._channel_ids = {}
+        self._channel_names = {}
+        self._node_ids = {}
+        self._parts = []
+
+    def __len__(self):
+        return len(self.time_ns)
+
+    def _channel_id(self, name):
+        key = table_name(name)
+        self._channel_names.setdefault(key, name)
+        return self._channel_ids.setdefault(key, len(self._channel_ids))
+
+    def name_channel(self, name):
+        self._channel_names[table_name(name)] = name
+
+    def _node_id(self, addr):
+        if not addr:
+            return -1
+        addr = addr.hex().upper() if isinstance(addr, bytes) else addr.upper()
+        return self._node_ids.setdefault(addr, len(self._node_ids))
+
+    def _finish(self):
+        for column in self.COLUMNS:
+            setattr(self, column, np.concatenate([part[column] for part in self._parts]) if self._parts else
+                    np.zeros(0, dtype=bool if column == "crc_ok" else np.float64 if column == "duration_ms" else np.int64))
+        self._parts = []
+        order = np.lexsort((self.time_ns, self.file))
+        for column in self.COLUMNS:
+            setattr(self, column, getattr(self, column)[order])
+        self.channels = [self._channel_names[key] for key in sorted(self._channel_ids, key=self._channel_ids.get)]
+        self.nodes = sorted(self._node_ids, key=self._node_ids.get)
+        starts = np.full(len(self.files), np.iinfo(np.int64).max)
+        ends = np.full(len(self.files), np.iinfo(np.int64).min)
+        np.minimum.at(starts, self.file, self.time_ns)
+        np.maximum.at(ends, self.file, self.time_ns)
+        self.file_span_s = np.where(ends > starts, (ends - starts) / 1e9, 0.0)
+        # For occupancy a file lasts until its last frame has ended.
+        np.maximum.at(ends, self.file, self.time_ns + (self.duration_ms * 1e6).astype(np.int64))
+        self.file_start_ns, self.file_end_ns = starts, ends
+
+    def span_s(self, mask):
+        return float(self.file_span_s[np.unique(self.file[mask])].sum())
+
+    def covered_s(self, windows, window_ns, mask):
+        # Seconds of each window in which the files of the masked frames were capturing, which is less
+        # than window_ns for the first and last window of a file.
+        lo = windows * window_ns
+        covered = np.zeros(len(windows), dtype=np.int64)
+        for f in np.unique(self.file[mask]):
+            covered += np.clip(np.minimum(lo + window_ns, self.file_end_ns[f]) - np.maximum(lo, self.file_start_ns[f]), 0, None)
+        return covered / 1e9
+
+
+def _map(values, convert, dtype):
+    # Converts each distinct value once; capture columns have few distinct values.
+    index = {}
+    codes = np.fromiter((index.setdefault(v, len(index)) for v in values), np.int64, len(values))
+    return np.array([convert(v) for v in index], dtype=dtype)[codes]
+
+
+def _parse_text_times(values):
+    # Legacy tables store local wall-clock strings; numpy parses them as UTC, so shift by the offset.
+    times = np.array(values, dtype="datetime64[ns]").astype(np.int64)
+    return times + (round(datetime.fromisoformat(values[0]).timestamp() * 1e9) - times[0])
+
+
+def _table_channel(name):
+    # Best guess at a channel name from its table name, used until a sniff_summary names it.
+    match = TABLE_MHZ_RE.fullmatch(name)
+    return f"{match.group(1)}.{match.group(2)}MHz" if match else name
+
+
+def _time_bound(column, time_ns):
+    if column == "Timestamp_ns":
+        return time_ns
+    return datetime.fromtimestamp(time_ns / 1e9).strftime("%Y-%m-%d %H:%M:%S.%f")
+
+
+def expand_paths(paths):
+    # Rotated captures are given by their manifest and contribute every segment database.
+    dbs = []
+    for path in paths:
+        if path.endswith(".json"):
+            with open(path) as f:
+                manifest = json.load(f)
+            directory = os.path.dirname(path)
+            dbs.extend(os.path.join(directory, segment["name"] + ".db") for segment in manifest["segments"]
+                       if ".db" in segment["files"])
+        else:
+            dbs.append(path)
+    return dbs
+
+
+def load_table(frames, conn, file_id, table, channel, since_ns=None, until_ns=None, index=True):
+    columns = {name: col_type.upper() for _, name, col_type, *_ in conn.execute(f"PRAGMA table_info({table})")}
+    ts = "Timestamp_ns" if "Timestamp_ns" in columns else "Timestamp"
+    if index:
+        try:
+            conn.execute(f"CREATE INDEX IF NOT EXISTS {table}_time ON {table}({ts})")
+        except sqlite3.OperationalError:
+            pass
+    where, params = [], []
+    for op, bound in ((">=", since_ns), ("<", until_ns)):
+        if bound is not None:
+            where.append(f"{ts} {op} ?")
+            params.append(_time_bound(ts, bound))
+    rows = conn.execute(f"SELECT {ts}, FrameType, SrcAddr, SeqNum, CRC_Check, PacketDuration_ms FROM {table}"
+                        f"{' WHERE ' + ' AND '.join(where) if where else ''} ORDER BY {ts}", params).fetchall()
+    if not rows:
+        return 0
+    times, frame_types, srcs, seqs, crcs, durations = zip(*rows)
+    text = columns.get("FrameType") == "TEXT"
+    frames._parts.append({
+        "time_ns": np.array(times, dtype=np.int64) if ts == "Timestamp_ns" else _parse_text_times(times),
+        "file": np.full(len(rows), file_id, dtype=np.int64),
+        "channel": np.full(len(rows), frames._channel_id(channel), dtype=np.int64),
+        "frame_type": _map(frame_types, (lambda v: FRAME_TYPE_CODES.get(v, -1)) if text else
+                           (lambda v: -1 if v is None else v), np.int64),
+        "node": _map(srcs, frames._node_id, np.int64),
+        "seq": _map(seqs, (lambda v: int(v, 16) if v else -1) if text else (lambda v: -1 if v is None else v), np.int64),
+        "crc_ok": np.array(crcs, dtype=bool),
+        "duration_ms": np.array(durations, dtype=np.float64),
+    })
+    return len(rows)
+
+
+def load_captures(paths, since_ns=None, until_ns=None, index=True):
+    frames = Frames()
+    for path in expand_paths(paths):
+        if not os.path.exists(path):
+            raise FileNotFoundError(path)
+        conn = sqlite3.connect(path) if index else sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+        try:
+            tables = [name for name, in conn.execute("SELECT name FROM sqlite_master WHERE type='table'")]
+            if "sniff_summary" in tables:
+                for ch, in conn.execute("SELECT Channel FROM sniff_summary"):
+                    frames.name_channel(ch)
+            file_id = len(frames.files)
+            frames.files.append(path)
+            for table in tables:
+                match = TABLE_RE.fullmatch(table)
+                if match:
+                    load_table(frames, conn, file_id, table, _table_channel(match.group(1)), since_ns, until_ns, index)
+            conn.commit()
+        finally:
+            conn.close()
+    frames._finish()
+    return frames
+
+
+def distribution(values):
+    if len(values) == 0:
+        return {"n": 0}
+    stats = {"n": int(len(values)), "mean": float(np.mean(values)), "max": float(np.max(values))}
+    stats.update((f"p{p}", float(v)) for p, v in zip(PERCENTILES, np.percentile(values, PERCENTILES)))
+    return stats
+
+
+def inter_arrival_ms(frames, mask):
+    idx = np.flatnonzero(mask)
+    gaps = np.diff(frames.time_ns[idx]) / 1e6
+    return gaps[frames.file[idx][1:] == frames.file[idx][:-1]]
+
+
+def sequence_progress(frames):
+    # Per node, CRC-valid non-ACK frames in time order: a frame is new unless it repeats the previous
+    # sequence number (retransmission or copy on another channel), and the expected count grows by
+    # the sequence gap. Gaps above MAX_SEQ_GAP are treated as a restart and count as one frame.
+    idx = np.flatnonzero(frames.crc_ok & (frames.frame_type != FRAME_TYPE_ACK) & (frames.node >= 0) & (frames.seq >= 0))
+    idx = idx[np.lexsort((frames.time_ns[idx], frames.node[idx], frames.file[idx]))]
+    key = frames.file[idx] * max(len(frames.nodes), 1) + frames.node[idx]
+    gap = np.ones(len(idx), dtype=np.int64)
+    gap[1:] = np.diff(frames.seq[idx]) % 256
+    gap[1:][key[1:] != key[:-1]] = 1
+    received = gap != 0
+    expected = np.where(gap > MAX_SEQ_GAP, 1, gap)
+    return idx, received, expected
+
+
+def _ratio(num, den):
+    return float(num / den) if den else None
+
+
+def _occupancy(airtime_ms, covered_s):
+    airtime_s, covered_s = np.broadcast_arrays(airtime_ms / 1000, covered_s)
+    return np.divide(airtime_s, covered_s, out=np.zeros(airtime_s.shape), where=covered_s > 0)
+
+
+def channel_report(frames, window_s):
+    report = []
+    window_ns = int(window_s * 1e9)
+    windows = frames.time_ns // window_ns
+    for ch, name in enumerate(frames.channels):
+        mask = frames.channel == ch
+        span = frames.span_s(mask)
+        airtime_s = frames.duration_ms[mask].sum() / 1000
+        starts, per_window = np.unique(windows[mask], return_inverse=True)
+        occupancy = _occupancy(np.bincount(per_window, frames.duration_ms[mask]),
+                               frames.covered_s(starts, window_ns, mask))
+        report.append({
+            "channel": name,
+            "frames": int(mask.sum()),
+            "crc_errors": int((mask & ~frames.crc_ok).sum()),
+            "crc_error_rate": _ratio((mask & ~frames.crc_ok).sum(), mask.sum()),
+            "frames_per_s": _ratio(mask.sum(), span),
+            "airtime_s": float(airtime_s),
+            "occupancy": _ratio(airtime_s, span),
+            "peak_window_occupancy": float(occupancy.max()) if len(occupancy) else None,
+            "inter_arrival_ms": distribution(inter_arrival_ms(frames, mask)),
+            "airtime_ms": distribution(frames.duration_ms[mask]),
+        })
+    return report
+
+
+def node_report(frames):
+    idx, received, expected = sequence_progress(frames)
+    report = []
+    for node, addr in enumerate(frames.nodes):
+        mask = frames.crc_ok & (frames.node == node)
+        if not mask.any():
+            # Only seen in frames with a bad CRC, so the address itself is unreliable.
+            continue
+        in_seq = frames.node[idx] == node
+        types = np.bincount(frames.frame_type[mask] + 1, minlength=len(FRAME_TYPE_NAMES) + 1)
+        report.append({
+            "node": addr,
+            "frames": int(mask.sum()),
+            "frames_per_s": _ratio(mask.sum(), frames.span_s(mask)),
+            "frame_types": {FRAME_TYPE_NAMES.get(code - 1, "Unknown"): int(n) for code, n in enumerate(types) if n},
+            "channels": [frames.channels[ch] for ch in np.unique(frames.channel[mask])],
+            "pdr": _ratio(received[in_seq].sum(), expected[in_seq].sum()),
+        })
+    return sorted(report, key=lambda node: -node["frames"])
+
+
+def window_report(frames, window_s):
+    window_ns = int(window_s * 1e9)
+    windows = frames.time_ns // window_ns
+    starts, per_frame = np.unique(windows, return_inverse=True)
+    n = len(starts)
+    total = np.bincount(per_frame, minlength=n)
+    errors = np.bincount(per_frame, ~frames.crc_ok, minlength=n)
+    airtime = np.bincount(per_frame * max(len(frames.channels), 1) + frames.channel, frames.duration_ms,
+                          minlength=n * max(len(frames.channels), 1)).reshape(n, -1)
+    idx, received, expected = sequence_progress(frames)
+    got = np.bincount(per_frame[idx], received, minlength=n)
+    want = np.bincount(per_frame[idx], expected, minlength=n)
+    covered = frames.covered_s(starts, window_ns, np.ones(len(frames), dtype=bool))
+    occupancy = _occupancy(airtime, covered[:, None])
+    return [{
+        "start_ns": int(start * window_ns),
+        "frames": int(total[i]),
+        "crc_error_rate": _ratio(errors[i], total[i]),
+        "pdr": _ratio(got[i], want[i]),
+        "occupancy": {name: float(occupancy[i, ch]) for ch, name in enumerate(frames.channels)},
+    } for i, start in enumerate(starts)]
+
+
+def analyze(frames, window_s=60.0):
+    return {
+        "files": frames.files,
+        "frames": len(frames),
+        "crc_valid": int(frames.crc_ok.sum()),
+        "span_s": float(frames.file_span_s.sum()),
+        "channels": channel_report(frames, window_s),
+        "nodes": node_report(frames),
+        "window_s": window_s,
+        "windows": window_report(frames, window_s),
+    }
+
+
+def _pct(value):
+    return f"{100 * value:5.1f}%" if value is not None else f"{'-':>6}"
+
+
+def _dist(stats, fmt="7.1f"):
+    return f"{stats['p50']:{fmt}} / {stats['p95']:{fmt}}" if stats["n"] else f"{'-':>7} / {'-':>7}"
+
+
+def format_report(report):
+    lines = [f"{report['frames']} frames ({report['crc_valid']} CRC valid) in {len(report['files'])} file(s), "
+             f"{report['span_s']:.1f} s of capture", "",
+             f"{'Channel':>12} | {'Frames':>7} | {'frames/s':>8} | {'CRC err':>7} | {'Occupancy':>9} | {'Peak':>6} | "
+             f"{'Inter-arrival ms p50/p95':>24} | {'Airtime ms p50/p95':>18}"]
+    for ch in report["channels"]:
+        lines.append(f"{ch['channel']:>12} | {ch['frames']:7} | {ch['frames_per_s'] or 0:8.2f} | {_pct(ch['crc_error_rate']):>7} | "
+                     f"{_pct(ch['occupancy']):>9} | {_pct(ch['peak_window_occupancy'])} | "
+                     f"{_dist(ch['inter_arrival_ms'], '10.1f'):>24} | {_dist(ch['airtime_ms']):>18}")
+    lines += ["", f"{'Node':>17} | {'Frames':>7} | {'frames/s':>8} | {'PDR':>6} | {'Channels':30} | Frame types"]
+    for node in report["nodes"]:
+        types = ", ".join(f"{name} {n}" for name, n in node["frame_types"].items())
+        lines.append(f"{node['node']:>17} | {node['frames']:7} | {node['frames_per_s'] or 0:8.2f} | {_pct(node['pdr'])} | "
+                     f"{', '.join(node['channels']):30} | {types}")
+    lines += ["", f"{'Window (' + format(report['window_s'], 'g') + ' s)':19} | {'Frames':>7} | {'CRC err':>7} | {'PDR':>6} | Occupancy"]
+    for window in report["windows"]:
+        start = datetime.fromtimestamp(window["start_ns"] / 1e9).strftime("%Y-%m-%d %H:%M:%S")
+        occupancy = " ".join(f"{name} {_pct(value).strip()}" for name, value in window["occupancy"].items() if value)
+        lines.append(f"{start:19} | {window['frames']:7} | {_pct(window['crc_error_rate']):>7} | {_pct(window['pdr'])} | {occupancy}")
+    return "\n".join(lines)
+
+
+def _parse_time(value):
+    return round(datetime.fromisoformat(value).timestamp() * 1e9) if value else None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="6TiSCH Packet Sniffer - capture database analysis")
+    parser.add_argument("databases", nargs="+", help="Capture databases or segment manifests (*.manifest.json)")
+    parser.add_argument("--window", type=float, default=60.0, help="Window length in seconds for PDR and occupancy")
+    parser.add_argument("--since", help="Only frames at or after this local time (YYYY-MM-DD HH:MM:SS)")
+    parser.add_argument("--until", help="Only frames before this local time (YYYY-MM-DD HH:MM:SS)")
+    parser.add_argument("--json", help="Write the full report as JSON to this file ('-' for stdout)")
+    parser.add_argument("--no-index", action="store_true", help="Open databases read-only and do not add indexes")
+    args = parser.parse_args(argv)
+    if args.window <= 0:
+        parser.error("--window must be positive")
+
+    start = time.perf_counter()
+    try:
+        frames = load_captures(args.databases, _parse_time(args.since), _parse_time(args.until), not args.no_index)
+    except (OSError, ValueError, sqlite3.Error) as exc:
+        parser.error(str(exc))
+    loaded = time.perf_counter()
+    report = analyze(frames, args.window)
+    if args.json == "-":
+        json.dump(report, sys.stdout, indent=2)
+        print()
+        return
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+    print(format_report(report))
+    print(f"\nLoaded {len(frames)} frames in {loaded - start:.2f} s, analyzed in {time.perf_counter() - loaded:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+class ChannelPlan:
+    def __init__(self, center_freq, spacing=200e3, n_channels=3, samp_rate=2e6, avoid_dc=False, first_channel=0):
+        n_bins = samp_rate / spacing
+        if abs(n_bins - round(n_bins)) > 1e-9:
+            raise ValueError(f"Sample rate {samp_rate:g} is not a multiple of the channel spacing {spacing:g}")
+        self.n_bins = int(round(n_bins))
+        if not 0 < n_channels < self.n_bins:
+            raise ValueError(f"{n_channels} channels do not fit in {self.n_bins} channelizer bins")
+        self.center_freq = center_freq
+        self.spacing = spacing
+        self.n_channels = n_channels
+        self.samp_rate = samp_rate
+        self.first_channel = first_channel
+        # Channelizer bins sit on integer multiples of the spacing around
+        # the tuned frequency. With avoid_dc the SDR is tuned one bin below
+        # the lowest channel so no channel lands on the LO leakage spike.
+        first_freq = center_freq - (n_channels - 1) * spacing / 2
+        if avoid_dc:
+            if n_channels >= self.n_bins // 2:
+                raise ValueError(f"{n_channels} channels do not fit in half of {self.n_bins} channelizer bins")
+            first = 1
+        else:
+            first = -((n_channels - 1) // 2)
+        self.tune_freq = first_freq - first * spacing
+        self.offsets = list(range(first, first + n_channels))
+        self.frequencies = [self.tune_freq + k * spacing for k in self.offsets]
+
+    def bin_index(self, channel):
+        return self.offsets[channel] % self.n_bins
+
+    def channel_index(self, number):
+        # Plan index of an 802.15.4 channel number, None when it is not received.
+        index = number - self.first_channel
+        return index if 0 <= index < self.n_channels else None
+
+    def channel_name(self, channel):
+        return f"{self.frequencies[channel] / 1e6:g}MHz"
+
+    def channel_names(self):
+        return [self.channel_name(ch) for ch in range(self.n_channels)]
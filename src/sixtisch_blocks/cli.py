@@ -0,0 +1,48 @@
+import sys
+import atexit
+import signal
+from .console import configure_console
+from .decoder_pool import configure_decoder_pool
+from .dedup import configure_dedup, DEDUP_DEFAULTS, SUPPRESS_MODES
+from .segments import configure_storage
+from .stats import StatsReporter, format_stats
+
+
+def add_runtime_args(parser):
+    # Storage rotation, dedup, decoding, console and statistics options shared by the sniffer and replay.
+    parser.add_argument("--rotate-minutes", type=float, default=0,
+                        help="Start a new database/pcap segment every N minutes (0 = never)")
+    parser.add_argument("--rotate-mb", type=float, default=0,
+                        help="Start a new segment once the current one reaches N MB (0 = no limit)")
+    parser.add_argument("--retention-gb", type=float, default=0,
+                        help="Delete the oldest segments to keep the capture under N GB (0 = keep everything)")
+    parser.add_argument("--suppress-copies", choices=list(SUPPRESS_MODES), default="none",
+                        help="Leave cross-channel duplicates (or also retransmissions with 'all') out of the database, pcap and console")
+    parser.add_argument("--dedup-window", type=float, default=DEDUP_DEFAULTS["window_s"],
+                        help="Seconds a frame is remembered for duplicate and retransmission detection")
+    parser.add_argument("--decoder-workers", type=int, default=1,
+                        help="Number of frame decoder workers (channels are spread across them)")
+    parser.add_argument("--decoder-mode", choices=["thread", "process"], default="thread",
+                        help="Decode frames in worker threads or in a process pool. Threads are faster for typical "
+                             "loads, where parsing is cheaper than shipping frames to another process; use process "
+                             "only with several --decoder-workers when decoding saturates a core next to the flowgraph")
+    parser.add_argument("--console", choices=["packet", "summary", "silent"], default="packet",
+                        help="Console output: one line per packet, periodic per-channel summary, or nothing")
+    parser.add_argument("--summary-interval", type=float, default=5.0,
+                        help="Seconds between console summaries in summary mode")
+    parser.add_argument("--stats-file",
+                        help="Periodically write segmenter, decoder and DB statistics as JSON to this file")
+    parser.add_argument("--stats-interval", type=float, default=5.0,
+                        help="Seconds between statistics dumps")
+
+
+def apply_runtime_args(args):
+    # Must run before the flowgraph is built: the shared services read their settings on first use.
+    configure_console(mode=args.console, interval=args.summary_interval)
+    if args.stats_file:
+        atexit.register(StatsReporter(args.stats_file, args.stats_interval).close)
+    signal.signal(signal.SIGUSR1, lambda *_: print(format_stats(), file=sys.stderr))
+    configure_decoder_pool(workers=args.decoder_workers, mode=args.decoder_mode)
+    configure_dedup(window_s=args.dedup_window, suppress=args.suppress_copies)
+    configure_storage(rotate_interval=args.rotate_minutes * 60, rotate_bytes=int(args.rotate_mb * 1e6),
+                      retention_bytes=int(args.retention_gb * 1e9))
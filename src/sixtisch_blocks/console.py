@@ -0,0 +1,166 @@
+import atexit
+import queue
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from .frame_parser import FRAME_TYPE_NAMES
+from .stats import register_source
+
+CONSOLE_MODES = ("packet", "summary", "silent")
+CONSOLE_DEFAULTS = {
+    "mode": "packet",
+    "interval": 5.0,
+    "max_queue": 1000,
+    "batch_size": 200,
+}
+PACKET_HEADER = f"{'Timestamp':26} | {'Frame Type':12} | {'CRC':8} | {'Seq':4} | {'Dest Addr':17} | {'Src Addr':17} | {'PAN ID':6}"
+
+_console = None
+_console_lock = threading.Lock()
+
+
+def format_packet_line(record):
+    timestamp = datetime.fromtimestamp(record.time_ns / 1e9).strftime("%Y-%m-%d %H:%M:%S.%f")
+    frame_type = FRAME_TYPE_NAMES.get(record.frame_type, "Unknown") if record.frame_type is not None else ""
+    return (f"{timestamp:26} | {frame_type:12} | {'VALID' if record.crc_ok else 'INVALID':8} | {record.seq.hex().upper():4} | "
+            f"{record.dest_addr.hex().upper():17} | {record.src_addr.hex().upper():17} | {record.pan_id.hex().upper():6}")
+
+
+class ChannelSummary:
+    def __init__(self):
+        self.frames = 0
+        self.crc_valid = 0
+        self.sources = Counter()
+
+    def add(self, record):
+        self.frames += 1
+        self.crc_valid += bool(record.crc_ok)
+        if record.src_addr:
+            self.sources[record.src_addr.hex().upper()] += 1
+
+    def format(self, channel, elapsed, top=3):
+        valid = 100.0 * self.crc_valid / self.frames if self.frames else 0.0
+        sources = ", ".join(f"{src} ({n})" for src, n in self.sources.most_common(top)) or "-"
+        return f"{channel:>12}: {self.frames / elapsed:7.2f} frames/s | CRC valid {valid:5.1f}% | top src: {sources}"
+
+
+class ConsoleSink:
+    def __init__(self, mode="packet", interval=5.0, max_queue=1000, batch_size=200, stream=None):
+        if mode not in CONSOLE_MODES:
+            raise ValueError(f"Unknown console mode: {mode}")
+        self.mode = mode
+        self.interval = float(interval)
+        self.batch_size = int(batch_size)
+        self.stream = stream or sys.stdout
+        self.queue = queue.Queue(maxsize=int(max_queue))
+        self.dropped = 0
+        self._reported_dropped = 0
+        self._summaries = {}
+        self._stop = object()
+        self._closed = False
+        self._lock = threading.Lock()
+        self.thread = None
+        if mode != "silent":
+            self.thread = threading.Thread(target=self._run, name="console", daemon=True)
+            self.thread.start()
+
+    def put(self, channel, record):
+        if self.thread is None or self._closed:
+            return
+        try:
+            self.queue.put_nowait((channel, record))
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+
+    def get_stats(self):
+        return {"mode": self.mode, "queue_depth": self.queue.qsize(), "dropped": self.dropped}
+
+    def close(self):
+        if self._closed or self.thread is None:
+            return
+        self._closed = True
+        self.queue.put(self._stop)
+        self.thread.join()
+
+    def _next_batch(self, timeout):
+        batch = []
+        try:
+            batch.append(self.queue.get(timeout=timeout))
+        except queue.Empty:
+            return batch
+        while batch[-1] is not self._stop and len(batch) < self.batch_size:
+            try:
+                batch.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _write(self, lines):
+        if not lines:
+            return
+        try:
+            self.stream.write("\n".join(lines) + "\n")
+            self.stream.flush()
+        except (OSError, ValueError):
+            pass
+
+    def _summary_lines(self, elapsed):
+        lines = [f"--- {datetime.now().strftime('%Y-%m-%d %H:%M:%S')} | last {elapsed:.1f} s ---"]
+        for channel, summary in sorted(self._summaries.items()):
+            lines.append(summary.format(channel, elapsed))
+        if len(lines) == 1:
+            lines.append("no frames")
+        self._summaries = {}
+        return lines
+
+    def _dropped_lines(self):
+        dropped = self.dropped
+        if dropped == self._reported_dropped:
+            return []
+        lines = [f"[console] {dropped - self._reported_dropped} lines dropped ({dropped} total)"]
+        self._reported_dropped = dropped
+        return lines
+
+    def _run(self):
+        last_summary = time.monotonic()
+        stop = False
+        while not stop:
+            timeout = max(0.0, last_summary + self.interval - time.monotonic())
+            batch = self._next_batch(timeout if self.mode == "summary" else 0.5)
+            if batch and batch[-1] is self._stop:
+                stop = True
+                batch.pop()
+            lines = []
+            if self.mode == "packet":
+                lines.extend(format_packet_line(record) for _, record in batch)
+            else:
+                for channel, record in batch:
+                    self._summaries.setdefault(channel, ChannelSummary()).add(record)
+                now = time.monotonic()
+                if now - last_summary >= self.interval or stop:
+                    lines.extend(self._summary_lines(max(now - last_summary, 1e-9)))
+                    last_summary = now
+            lines.extend(self._dropped_lines())
+            self._write(lines)
+
+
+def configure_console(**kwargs):
+    unknown = set(kwargs) - set(CONSOLE_DEFAULTS)
+    if unknown:
+        raise ValueError(f"Unknown console settings: {', '.join(sorted(unknown))}")
+    if _console is not None:
+        raise RuntimeError("Console sink already started")
+    CONSOLE_DEFAULTS.update(kwargs)
+
+
+def get_console():
+    global _console
+    with _console_lock:
+        if _console is None:
+            _console = ConsoleSink(**CONSOLE_DEFAULTS)
+            atexit.register(_console.close)
+            register_source("console", _console.get_stats)
+        return _console
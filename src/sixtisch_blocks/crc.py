@@ -0,0 +1,49 @@
+import numpy as np
+
+CRC16_POLY = 0x1021
+CRC16_INIT = 0x1D0F
+CRC16_XOROUT = 0xFFFF
+
+
+def _make_table():
+    table = np.zeros(256, dtype=np.uint16)
+    for i in range(256):
+        crc = i << 8
+        for _ in range(8):
+            if crc & 0x8000:
+                crc = ((crc << 1) ^ CRC16_POLY) & 0xFFFF
+            else:
+                crc = (crc << 1) & 0xFFFF
+        table[i] = crc
+    return table
+
+
+CRC16_TABLE = _make_table()
+_TABLE = CRC16_TABLE.tolist()
+
+
+def crc16(data):
+    crc = CRC16_INIT
+    for b in data:
+        crc = ((crc << 8) & 0xFFFF) ^ _TABLE[(crc >> 8) ^ b]
+    return crc ^ CRC16_XOROUT
+
+
+def crc16_batch(frames):
+    n = len(frames)
+    lengths = np.fromiter((len(f) for f in frames), dtype=np.intp, count=n)
+    crc = np.full(n, CRC16_INIT, dtype=np.uint16)
+    if n == 0:
+        return crc
+    data = np.zeros((n, int(lengths.max())), dtype=np.uint8)
+    for row, frame in enumerate(frames):
+        data[row, :lengths[row]] = np.frombuffer(bytes(frame), dtype=np.uint8)
+    for col in range(data.shape[1]):
+        active = lengths > col
+        updated = (crc << 8) ^ CRC16_TABLE[(crc >> 8) ^ data[:, col]]
+        crc = np.where(active, updated, crc)
+    return crc ^ np.uint16(CRC16_XOROUT)
+
+
+def check_crc16_batch(frames, received):
+    return crc16_batch(frames) == np.asarray(received, dtype=np.uint16)
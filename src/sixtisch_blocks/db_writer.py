@@ -0,0 +1,191 @@
+import atexit
+import queue
+import sqlite3
+import sys
+import threading
+import time
+from itertools import groupby
+from .segments import get_segment_manager
+from .stats import Histogram, register_source
+
+WRITER_DEFAULTS = {
+    "batch_size": 256,
+    "flush_interval": 0.5,
+    "max_queue": 10000,
+    "policy": "drop",
+    "synchronous": "NORMAL",
+}
+
+_writers = {}
+_writers_lock = threading.Lock()
+
+
+class DBWriter:
+    def __init__(self, db_path, batch_size=256, flush_interval=0.5, max_queue=10000, policy="drop", synchronous="NORMAL",
+                 segments=None):
+        if policy not in ("drop", "block"):
+            raise ValueError(f"Unknown queue policy: {policy}")
+        if str(synchronous).upper() not in ("OFF", "NORMAL", "FULL", "EXTRA"):
+            raise ValueError(f"Unknown synchronous setting: {synchronous}")
+        self.db_path = db_path
+        self.segments = segments
+        self.segment_id = None
+        self.batch_size = int(batch_size)
+        self.flush_interval = float(flush_interval)
+        self.policy = policy
+        self.synchronous = str(synchronous).upper()
+        self.queue = queue.Queue(maxsize=int(max_queue))
+        self.dropped = 0
+        self.written = 0
+        self.errors = 0
+        self.insert_latency_us = Histogram()
+        self._schema = []
+        self._stop = object()
+        self._closed = False
+        self._count_lock = threading.Lock()
+        self.thread = threading.Thread(target=self._run, name="db-writer", daemon=True)
+        self.thread.start()
+
+    # sql is a statement or a callable taking the connection. Everything but INSERTs is kept and
+    # replayed on each new segment so the tables exist there too.
+    def put(self, sql, row=(), block=None):
+        if block is None:
+            block = self.policy == "block"
+        if block:
+            self.queue.put((sql, row))
+            return True
+        try:
+            self.queue.put_nowait((sql, row))
+            return True
+        except queue.Full:
+            with self._count_lock:
+                self.dropped += 1
+            return False
+
+    def qsize(self):
+        return self.queue.qsize()
+
+    def get_stats(self):
+        return {
+            "queue_depth": self.queue.qsize(),
+            "written": self.written,
+            "dropped": self.dropped,
+            "errors": self.errors,
+            "insert_latency_us": self.insert_latency_us.to_dict(),
+        }
+
+    def flush(self):
+        self.queue.join()
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        self.queue.put(self._stop)
+        self.thread.join()
+
+    def _connect(self):
+        if self.segments is not None:
+            self.segment_id = self.segments.segment_id
+            self.db_path = self.segments.path(".db")
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(f"PRAGMA synchronous={self.synchronous}")
+        return conn
+
+    def _next_batch(self):
+        batch = []
+        stop = False
+        try:
+            item = self.queue.get(timeout=self.flush_interval)
+        except queue.Empty:
+            return batch, stop
+        deadline = time.monotonic() + self.flush_interval
+        while True:
+            if item is self._stop:
+                stop = True
+                break
+            batch.append(item)
+            if len(batch) >= self.batch_size:
+                break
+            remaining = deadline - time.monotonic()
+            try:
+                item = self.queue.get(timeout=remaining) if remaining > 0 else self.queue.get_nowait()
+            except queue.Empty:
+                break
+        return batch, stop
+
+    def _write(self, conn, batch):
+        t0 = time.perf_counter_ns()
+        try:
+            with conn:
+                for sql, items in groupby(batch, key=lambda item: item[0]):
+                    rows = [row for _, row in items]
+                    if callable(sql):
+                        sql(conn)
+                    elif sql.lstrip().upper().startswith("INSERT"):
+                        conn.executemany(sql, rows)
+                    else:
+                        for row in rows:
+                            conn.execute(sql, row)
+                    if callable(sql) or not sql.lstrip().upper().startswith("INSERT"):
+                        self._schema.extend((sql, row) for row in rows)
+            self.written += len(batch)
+            self.insert_latency_us.add((time.perf_counter_ns() - t0) / 1000)
+        except sqlite3.Error as exc:
+            self.errors += 1
+            print(f"DB writer: dropped batch of {len(batch)} rows: {exc}", file=sys.stderr)
+
+    def _open(self):
+        try:
+            return self._connect()
+        except sqlite3.Error as exc:
+            print(f"DB writer: cannot open {self.db_path}: {exc}", file=sys.stderr)
+            return None
+
+    def _release(self, conn):
+        if conn is not None:
+            conn.close()
+        if self.segments is not None:
+            self.segments.release(self.db_path)
+
+    def _rotate(self, conn):
+        self._release(conn)
+        conn = self._open()
+        if conn is not None and self._schema:
+            schema, self._schema = self._schema, []
+            self._write(conn, schema)
+            self.written -= len(schema)
+        return conn
+
+    def _run(self):
+        conn = self._open()
+        stop = False
+        while not stop:
+            batch, stop = self._next_batch()
+            if self.segments is not None and (self.segments.maybe_rotate() or self.segments.segment_id != self.segment_id):
+                conn = self._rotate(conn)
+            if batch and conn is not None:
+                self._write(conn, batch)
+            elif batch:
+                self.dropped += len(batch)
+            for _ in range(len(batch) + stop):
+                self.queue.task_done()
+        self._release(conn)
+
+
+def configure_writer(**kwargs):
+    unknown = set(kwargs) - set(WRITER_DEFAULTS)
+    if unknown:
+        raise ValueError(f"Unknown writer settings: {', '.join(sorted(unknown))}")
+    WRITER_DEFAULTS.update(kwargs)
+
+
+def get_writer(db_path):
+    with _writers_lock:
+        writer = _writers.get(db_path)
+        if writer is None:
+            writer = _writers[db_path] = DBWriter(db_path, **WRITER_DEFAULTS, segments=get_segment_manager(db_path))
+            atexit.register(writer.close)
+            register_source(f"db:{db_path}", writer.get_stats)
+        return writer
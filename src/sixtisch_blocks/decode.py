@@ -0,0 +1,90 @@
+import os
+import time
+import argparse
+import numpy as np
+from .console import PACKET_HEADER, format_packet_line
+from .db_writer import DBWriter
+from .decoder import FrameDecoder
+from .dedup import DEDUP_DEFAULTS, SUPPRESS_MODES, RETRANSMISSION, FrameCorrelator
+from .pcap import PcapWriter
+from .storage import SCHEMAS, ROW_BUILDERS, table_name, insert_sql, init_table, write_summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="6TiSCH Packet Sniffer - offline decoder for saved bit streams")
+    parser.add_argument("bit_file", help="Sliced bit stream, one bit per byte (or 8 bits per byte with --packed)")
+    parser.add_argument("--packed", action="store_true", help="Input holds 8 bits per byte, MSB first")
+    parser.add_argument("--access-code", default="1001000001001110")
+    parser.add_argument("--threshold", type=int, default=0, help="Allowed bit errors in the sync word")
+    parser.add_argument("--max-frame-len", type=int, default=127)
+    parser.add_argument("--bitrate", type=int, default=50_000)
+    parser.add_argument("--start-time", type=float,
+                        help="UNIX time of the first bit (default: file modification time minus the capture length)")
+    parser.add_argument("--chunk-size", type=int, default=1 << 20, help="Input items decoded per chunk")
+    parser.add_argument("--channel", default="default", help="Channel name used for the database table")
+    parser.add_argument("--db", help="SQLite database to write decoded packets to")
+    parser.add_argument("--schema", choices=list(SCHEMAS), default="text")
+    parser.add_argument("--pcap", help="Write decoded frames to this pcap file")
+    parser.add_argument("--packets", action="store_true", help="Print one line per decoded packet")
+    parser.add_argument("--suppress-copies", choices=list(SUPPRESS_MODES), default="none",
+                        help="Leave repeated frames out of the database, pcap and packet lines")
+    parser.add_argument("--dedup-window", type=float, default=DEDUP_DEFAULTS["window_s"],
+                        help="Seconds a frame is remembered for retransmission detection")
+    args = parser.parse_args(argv)
+
+    if os.path.getsize(args.bit_file) == 0:
+        parser.error(f"{args.bit_file} is empty")
+    data = np.memmap(args.bit_file, dtype=np.uint8, mode="r")
+    n_bits = len(data) * (8 if args.packed else 1)
+    decoder = FrameDecoder(args.access_code, args.threshold, args.max_frame_len, args.packed, args.bitrate)
+    if args.start_time is not None:
+        decoder.set_anchor(round(args.start_time * 1e9), 0)
+    else:
+        decoder.set_anchor(os.stat(args.bit_file).st_mtime_ns - n_bits * 1_000_000_000 // args.bitrate, 0)
+
+    correlator = FrameCorrelator(args.dedup_window, suppress=args.suppress_copies)
+    db = pcap = None
+    if args.db:
+        db = DBWriter(args.db, policy="block")
+        table = table_name(args.channel)
+        init_table(db, table, args.schema)
+        sql = insert_sql(table)
+        make_row = ROW_BUILDERS[args.schema]
+    if args.pcap:
+        pcap = PcapWriter(args.pcap)
+    if args.packets:
+        print(PACKET_HEADER)
+        print("-"*110)
+
+    frames = crc_valid = retransmissions = 0
+    airtime_ms = 0.0
+    start = time.perf_counter()
+    for i in range(0, len(data), args.chunk_size):
+        for record in decoder.feed(data[i:i+args.chunk_size]):
+            frames += 1
+            crc_valid += record.crc_ok
+            duration_ms = decoder.frame_bits(len(record.payload)) / args.bitrate * 1000
+            airtime_ms += duration_ms
+            copy = correlator.classify(args.channel, record)
+            retransmissions += copy == RETRANSMISSION
+            if correlator.suppress(copy):
+                continue
+            if args.packets:
+                print(format_packet_line(record))
+            if db is not None:
+                db.put(sql, make_row(record, duration_ms, decoder.sfd_width, copy))
+            if pcap is not None:
+                pcap.write(record.time_ns, record.payload)
+    elapsed = time.perf_counter() - start
+
+    if db is not None:
+        write_summary(db, args.channel, frames, airtime_ms / 1000)
+        db.close()
+    if pcap is not None:
+        pcap.close()
+    print(f"\nDecoded {frames} frames ({crc_valid} CRC valid, {retransmissions} retransmissions) from {n_bits} bits in {elapsed:.2f} s "
+          f"({n_bits / max(elapsed, 1e-9):,.0f} bit/s, {n_bits / args.bitrate / max(elapsed, 1e-9):.0f}x realtime)")
+
+
+if __name__ == "__main__":
+    main()
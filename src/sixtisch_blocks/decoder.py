@@ -0,0 +1,217 @@
+import time
+import threading
+from collections import deque
+import numpy as np
+from .crc import crc16
+from .frame_parser import parse_frame
+from .stats import SegmenterStats
+
+WORK_CHUNK_BITS = 8192
+HEADER_BITS = 24
+MIN_PSDU_LEN = 2
+RESERVED_FRAME_TYPE = 4
+RESERVED_FRAME_VERSION = 3
+RESERVED_ADDR_MODE = 1
+
+_clocks = {}
+_clocks_lock = threading.Lock()
+
+
+class StreamClock:
+    # Wall-clock time of item 0 shared by the blocks fed from one sample stream (e.g. all outputs of a
+    # channelizer). Whichever block sees data first fixes it, so sample and bit offsets from every
+    # channel map onto the same time base instead of each block's own first-work wall clock.
+    def __init__(self, now=time.time_ns):
+        self.now = now
+        self.start_ns = None
+        self._lock = threading.Lock()
+
+    def zero_ns(self, items, rate):
+        with self._lock:
+            if self.start_ns is None:
+                self.start_ns = self.now() - int(items * 1_000_000_000 // rate)
+            return self.start_ns
+
+
+class FrameDecoder:
+    def __init__(self, access_code='1001000001001110', threshold=0, max_frame_len=127, packed_input=False,
+                 bitrate=50_000, stats=None, clock=None):
+        self.access_code = np.array([int(b) for b in str(access_code).strip()], dtype=np.uint8)
+        self.code_len = len(self.access_code)
+        self.access_code_bipolar = self.access_code.astype(np.int8) * 2 - 1
+        self.sfd_weights = 1 << np.arange(self.code_len - 1, -1, -1, dtype=np.int64)
+        self.sfd_width = ((self.code_len + 7) // 8) * 2
+        self.header_offsets = self.code_len + np.arange(HEADER_BITS)
+        self.threshold = int(threshold)
+        self.packed_input = bool(packed_input)
+        self.max_frame_len = int(max_frame_len)
+        self.max_frame_bits = self.code_len + 8 + (self.max_frame_len + 2) * 8
+        # A CRC-failed frame stays buffered until nothing starting inside it can still turn out valid,
+        # which takes up to two frame lengths.
+        self.buffer = np.zeros(2 * self.max_frame_bits + WORK_CHUNK_BITS, dtype=np.uint8)
+        self.fill = 0
+        self.buffer_offset = 0
+        self.bitrate = int(bitrate)
+        self.anchors = deque()
+        self.clock = clock
+        self.stats = stats if stats is not None else SegmenterStats()
+
+    @property
+    def bits_fed(self):
+        return self.buffer_offset + self.fill
+
+    def set_anchor(self, time_ns, bit):
+        # An anchor applies from its bit on (e.g. one rx_time tag per squelch burst), so frames still
+        # buffered from before a gap keep the anchor they started under.
+        bit = int(bit)
+        while self.anchors and self.anchors[-1][0] >= bit:
+            self.anchors.pop()
+        self.anchors.append((bit, int(time_ns)))
+
+    def time_at(self, bit):
+        while len(self.anchors) > 1 and self.anchors[1][0] <= self.buffer_offset:
+            self.anchors.popleft()
+        anchor_bit, anchor_ns = self.anchors[0]
+        for next_bit, next_ns in self.anchors:
+            if next_bit > bit:
+                break
+            anchor_bit, anchor_ns = next_bit, next_ns
+        return anchor_ns + (bit - anchor_bit) * 1_000_000_000 // self.bitrate
+
+    def frame_bits(self, psdu_len):
+        return self.code_len + (psdu_len + 3) * 8
+
+    def _find_sync(self, buf):
+        n = len(buf) - self.code_len - HEADER_BITS + 1
+        if n <= 0:
+            return [], [], 0
+        bipolar = buf[:n + self.code_len - 1].astype(np.int8) * 2 - 1
+        corr = np.correlate(bipolar, self.access_code_bipolar, mode='valid')
+        candidates = np.flatnonzero(corr >= self.code_len - 2 * self.threshold)
+        headers = np.packbits(buf[candidates[:, None] + self.header_offsets], axis=1).astype(np.int64)
+        return candidates.tolist(), (headers[:, 0] | headers[:, 1] << 8 | headers[:, 2] << 16).tolist(), n
+
+    def _plausible(self, header):
+        # PHR within the MAC frame limits and no reserved frame type, frame version or addressing
+        # mode in the frame control field; sync words matched in noise mostly fail one of these.
+        psdu_len, fcf = header & 0xFF, header >> 8
+        if not MIN_PSDU_LEN <= psdu_len <= self.max_frame_len:
+            return False
+        return ((fcf & 0b111) != RESERVED_FRAME_TYPE and (fcf >> 12) & 3 != RESERVED_FRAME_VERSION
+                and (fcf >> 10) & 3 != RESERVED_ADDR_MODE and (fcf >> 14) & 3 != RESERVED_ADDR_MODE)
+
+    def _frame(self, buf, pos, frame):
+        bit_offset = self.buffer_offset + pos
+        return (
+            int(buf[pos:pos+self.code_len] @ self.sfd_weights),
+            frame,
+            bit_offset,
+            self.time_at(bit_offset)
+        )
+
+    def _segment(self, buf):
+        # Candidates whose frame is still incomplete do not stop the scan: a later CRC-valid frame
+        # supersedes every earlier candidate overlapping it. A frame is only CRC-checked when another
+        # candidate overlaps it; a failed one is emitted once no candidate inside it can still be valid.
+        candidates, headers, n = self._find_sync(buf)
+        frames = []
+        consumed = 0
+        pending = None
+        waiting = []
+        rejected = []
+        dropped = []
+        for j, (pos, header) in enumerate(zip(candidates, headers)):
+            if pos < consumed:
+                continue
+            if pending is not None and pos >= pending[1] and not waiting:
+                frames.append(pending[2])
+                consumed = pending[1]
+                pending = None
+            if not self._plausible(header):
+                rejected.append(pos)
+                continue
+            end = pos + self.frame_bits(header & 0xFF)
+            if end > len(buf):
+                waiting.append(pos)
+                continue
+            frame = np.packbits(buf[pos+self.code_len:end]).tobytes()
+            contested = (waiting or pending is not None or end > n
+                         or (j + 1 < len(candidates) and candidates[j + 1] < end))
+            if contested and crc16(frame[:-2]) != int.from_bytes(frame[-2:], 'big'):
+                if waiting:
+                    continue
+                if pending is None:
+                    pending = (pos, end, self._frame(buf, pos, frame))
+                else:
+                    dropped.append(pos)
+                continue
+            dropped.extend(waiting)
+            waiting = []
+            if pending is not None:
+                if pos < pending[1]:
+                    dropped.append(pending[0])
+                else:
+                    frames.append(pending[2])
+                pending = None
+            frames.append(self._frame(buf, pos, frame))
+            consumed = end
+        if pending is not None and not waiting and n >= pending[1]:
+            frames.append(pending[2])
+            consumed = pending[1]
+            pending = None
+        keep = min(waiting[:1] + ([pending[0]] if pending is not None else []), default=max(n, consumed))
+        # Everything from keep on is scanned again with the next chunk, so only count what is settled.
+        rejected = sum(pos < keep for pos in rejected)
+        dropped = sum(pos < keep for pos in dropped)
+        self.stats.phr_rejects += rejected
+        self.stats.superseded += dropped
+        self.stats.sync_hits += rejected + dropped + len(frames)
+        return frames, keep
+
+    def search(self, chunk):
+        # Yields (sfd, frame, bit_offset, time_ns) for every complete frame; frame holds PHR, payload and CRC.
+        # The carry buffer only advances while the generator is consumed.
+        bits_per_item = 8 if self.packed_input else 1
+        if not self.anchors:
+            bits = self.bits_fed + len(chunk) * bits_per_item
+            if self.clock is not None:
+                self.set_anchor(self.clock.zero_ns(bits, self.bitrate), 0)
+            else:
+                self.set_anchor(time.time_ns(), bits)
+        capacity = len(self.buffer)
+        n = 0
+        while n < len(chunk):
+            if self.packed_input:
+                k = min((capacity - self.fill) // 8, len(chunk) - n)
+                self.buffer[self.fill:self.fill+8*k] = np.unpackbits(chunk[n:n+k])
+                self.fill += 8 * k
+            else:
+                k = min(capacity - self.fill, len(chunk) - n)
+                self.buffer[self.fill:self.fill+k] = chunk[n:n+k]
+                self.fill += k
+            n += k
+            frames, i = self._segment(self.buffer[:self.fill])
+            self.buffer[:self.fill-i] = self.buffer[i:self.fill]
+            self.fill -= i
+            self.buffer_offset += i
+            self.stats.bits_consumed += k * bits_per_item
+            self.stats.carry_bits = self.fill
+            yield from frames
+
+    def feed(self, chunk):
+        for frame in self.search(chunk):
+            yield parse_frame(*frame)
+
+
+def get_stream_clock(name):
+    with _clocks_lock:
+        clock = _clocks.get(name)
+        if clock is None:
+            clock = _clocks[name] = StreamClock()
+        return clock
+
+
+def decode_bits(data, chunk_size=1 << 20, **kwargs):
+    decoder = FrameDecoder(**kwargs)
+    for start in range(0, len(data), chunk_size):
+        yield from decoder.feed(data[start:start+chunk_size])
@@ -0,0 +1,147 @@
+import atexit
+import multiprocessing
+import queue
+import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from .frame_parser import parse_frame, parse_frames
+from .stats import register_source
+
+POOL_DEFAULTS = {
+    "workers": 1,
+    "mode": "thread",
+    "max_queue": 10000,
+    "policy": "drop",
+    "batch_size": 64,
+}
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+class DecoderPool:
+    def __init__(self, workers=1, mode="thread", max_queue=10000, policy="drop", batch_size=64):
+        if mode not in ("thread", "process"):
+            raise ValueError(f"Unknown decoder mode: {mode}")
+        if policy not in ("drop", "block"):
+            raise ValueError(f"Unknown queue policy: {policy}")
+        self.workers = max(1, int(workers))
+        self.mode = mode
+        self.policy = policy
+        self.batch_size = int(batch_size)
+        self.dropped = 0
+        self.decoded = 0
+        self._stop = object()
+        self._closed = False
+        self._next_lane = 0
+        self._lock = threading.Lock()
+        self.executor = None
+        if mode == "process":
+            # Forking a process that runs the flowgraph threads can copy held locks into the workers.
+            self.executor = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("forkserver"))
+        self.queues = [queue.Queue(maxsize=int(max_queue)) for _ in range(self.workers)]
+        self.threads = [threading.Thread(target=self._run, args=(q,), name=f"decoder-{n}", daemon=True)
+                        for n, q in enumerate(self.queues)]
+        for t in self.threads:
+            t.start()
+
+    def register(self):
+        with self._lock:
+            lane = self._next_lane % self.workers
+            self._next_lane += 1
+        return lane
+
+    def submit(self, lane, sink, item):
+        if self.policy == "block":
+            self.queues[lane].put((sink, item))
+            return True
+        try:
+            self.queues[lane].put_nowait((sink, item))
+            return True
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+            return False
+
+    def qsize(self, lane=None):
+        if lane is not None:
+            return self.queues[lane].qsize()
+        return sum(q.qsize() for q in self.queues)
+
+    def get_stats(self):
+        return {
+            "mode": self.mode,
+            "workers": self.workers,
+            "queue_depth": self.qsize(),
+            "decoded": self.decoded,
+            "dropped": self.dropped,
+        }
+
+    def flush(self):
+        for q in self.queues:
+            q.join()
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        for q in self.queues:
+            q.put(self._stop)
+        for t in self.threads:
+            t.join()
+        if self.executor is not None:
+            self.executor.shutdown()
+
+    def _next_batch(self, q):
+        batch = [q.get()]
+        while batch[-1] is not self._stop and len(batch) < self.batch_size:
+            try:
+                batch.append(q.get_nowait())
+            except queue.Empty:
+                break
+        stop = batch[-1] is self._stop
+        return (batch[:-1] if stop else batch), stop
+
+    def _decode(self, batch):
+        items = [item for _, item in batch]
+        if self.executor is None:
+            return [parse_frame(*item) for item in items]
+        try:
+            return self.executor.submit(parse_frames, items).result()
+        except RuntimeError:
+            # The executor is shut down before atexit handlers run, so
+            # frames still queued at exit are decoded in this thread.
+            return parse_frames(items)
+
+    def _run(self, q):
+        stop = False
+        while not stop:
+            batch, stop = self._next_batch(q)
+            try:
+                records = self._decode(batch)
+                for (sink, _), record in zip(batch, records):
+                    sink(record)
+            except Exception as exc:
+                print(f"Decoder: dropped batch of {len(batch)} frames: {exc!r}", file=sys.stderr)
+            self.decoded += len(batch)
+            for _ in range(len(batch) + stop):
+                q.task_done()
+
+
+def configure_decoder_pool(**kwargs):
+    unknown = set(kwargs) - set(POOL_DEFAULTS)
+    if unknown:
+        raise ValueError(f"Unknown decoder pool settings: {', '.join(sorted(unknown))}")
+    if _pool is not None:
+        raise RuntimeError("Decoder pool already started")
+    POOL_DEFAULTS.update(kwargs)
+
+
+def get_decoder_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = DecoderPool(**POOL_DEFAULTS)
+            atexit.register(_pool.close)
+            register_source("decoder", _pool.get_stats)
+        return _pool
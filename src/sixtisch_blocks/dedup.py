@@ -0,0 +1,98 @@
+import threading
+from collections import OrderedDict
+from .stats import register_source
+
+FIRST, DUPLICATE, RETRANSMISSION = 0, 1, 2
+COPY_NAMES = {FIRST: "First", DUPLICATE: "Duplicate", RETRANSMISSION: "Retransmission"}
+SUPPRESS_MODES = {"none": (), "duplicates": (DUPLICATE,), "all": (DUPLICATE, RETRANSMISSION)}
+DEDUP_DEFAULTS = {
+    "window_s": 2.0,
+    "duplicate_window_ms": 5.0,
+    "max_entries": 4096,
+    "suppress": "none",
+}
+
+_correlator = None
+_correlator_lock = threading.Lock()
+
+
+class FrameCorrelator:
+    # Remembers CRC-valid frames by (src, dest, seq, PSDU hash) for window_s of stream time, capped at
+    # max_entries (least recently seen first out). A repeat heard on another channel within
+    # duplicate_window_ms is the same transmission leaking into a neighbouring channel; any other
+    # repeat is a link-layer retry. Frames with a bad CRC are never matched.
+    def __init__(self, window_s=2.0, duplicate_window_ms=5.0, max_entries=4096, suppress="none"):
+        if suppress not in SUPPRESS_MODES:
+            raise ValueError(f"Unknown suppress mode: {suppress}")
+        self.window_ns = int(window_s * 1e9)
+        self.duplicate_window_ns = int(duplicate_window_ms * 1e6)
+        self.max_entries = int(max_entries)
+        self.suppress_mode = suppress
+        self.suppressed_kinds = SUPPRESS_MODES[suppress]
+        self.entries = OrderedDict()
+        self.counts = dict.fromkeys(COPY_NAMES, 0)
+        self.evicted = 0
+        self._lock = threading.Lock()
+
+    def _expire(self, time_ns):
+        while self.entries:
+            _, (_, seen_ns) = next(iter(self.entries.items()))
+            if time_ns - seen_ns <= self.window_ns:
+                break
+            self.entries.popitem(last=False)
+
+    def classify(self, channel, record):
+        if not record.crc_ok:
+            with self._lock:
+                self.counts[FIRST] += 1
+            return FIRST
+        key = (record.src_addr, record.dest_addr, record.seq, hash(record.payload))
+        with self._lock:
+            self._expire(record.time_ns)
+            seen = self.entries.get(key)
+            if seen is None:
+                kind = FIRST
+            elif seen[0] != channel and abs(record.time_ns - seen[1]) < self.duplicate_window_ns:
+                kind = DUPLICATE
+            else:
+                kind = RETRANSMISSION
+            if kind != DUPLICATE:
+                # Retries are timed from the latest transmission, leakage copies from the original.
+                self.entries[key] = (channel, record.time_ns)
+            self.entries.move_to_end(key)
+            if len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.evicted += 1
+            self.counts[kind] += 1
+        return kind
+
+    def suppress(self, kind):
+        return kind in self.suppressed_kinds
+
+    def get_stats(self):
+        return {
+            "entries": len(self.entries),
+            "first": self.counts[FIRST],
+            "duplicates": self.counts[DUPLICATE],
+            "retransmissions": self.counts[RETRANSMISSION],
+            "evicted": self.evicted,
+            "suppress": self.suppress_mode,
+        }
+
+
+def configure_dedup(**kwargs):
+    unknown = set(kwargs) - set(DEDUP_DEFAULTS)
+    if unknown:
+        raise ValueError(f"Unknown dedup settings: {', '.join(sorted(unknown))}")
+    if _correlator is not None:
+        raise RuntimeError("Frame correlator already started")
+    DEDUP_DEFAULTS.update(kwargs)
+
+
+def get_correlator():
+    global _correlator
+    with _correlator_lock:
+        if _correlator is None:
+            _correlator = FrameCorrelator(**DEDUP_DEFAULTS)
+            register_source("dedup", _correlator.get_stats)
+        return _correlator
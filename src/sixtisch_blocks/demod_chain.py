@@ -0,0 +1,47 @@
+from gnuradio import analog
+from gnuradio import blocks
+from gnuradio import digital
+from gnuradio import filter
+from gnuradio import gr
+from gnuradio.filter import firdes
+from gnuradio.fft import window
+from .squelch_gate import SquelchGate
+
+
+class FSKDemodChain(gr.hier_block2):
+    def __init__(self, samp_rate=2e6, bitrate=50e3, freq_offset=-900e3, squelch_db=-30, demod_gain=None, avg_len=None,
+                 squelch_gate=True, time_base="", schedule=None):
+        gr.hier_block2.__init__(
+            self, "FSK Demod Chain",
+            gr.io_signature(1, 1, gr.sizeof_gr_complex),
+            gr.io_signature(1, 1, gr.sizeof_char),
+        )
+        self.samp_rate = samp_rate
+        self.bitrate = bitrate
+        self.samp_per_sym = samp_per_sym = samp_rate / bitrate
+        if avg_len is None:
+            avg_len = max(1, round(15 * samp_per_sym / 40))
+        if demod_gain is None:
+            # The quadrature demod output scales with 1/samp_rate; 25 was tuned at 2 MS/s.
+            demod_gain = 25 * samp_rate / 2e6
+
+        self.freq_xlating_fir_filter = None
+        if freq_offset is not None:
+            self.taps = taps = firdes.low_pass(1.0, samp_rate, 85e3, 15e3, window.WIN_HAMMING)
+            self.freq_xlating_fir_filter = filter.freq_xlating_fir_filter_ccc(1, taps, freq_offset, samp_rate)
+        # Drops quiet samples like a gated pwr_squelch_cc, but tags the samples it passes with their
+        # sample-count time, which the segmenter anchors frame timestamps on.
+        self.squelch = SquelchGate(samp_rate, squelch_db, squelch_gate, time_base, schedule)
+        self.quadrature_demod = analog.quadrature_demod_cf(demod_gain)
+        self.moving_average = blocks.moving_average_ff(avg_len, 1, 4000, 1)
+        self.clock_recovery = digital.clock_recovery_mm_ff(samp_per_sym, (0.25*0.175*0.175), 0.5, 0.175, 0.005)
+        self.binary_slicer = digital.binary_slicer_fb()
+
+        chain = [self.squelch, self.quadrature_demod, self.moving_average, self.clock_recovery, self.binary_slicer]
+        if self.freq_xlating_fir_filter is not None:
+            chain.insert(0, self.freq_xlating_fir_filter)
+        self.connect(self, *chain, self)
+
+    def set_freq_offset(self, freq_offset):
+        self.freq_xlating_fir_filter.set_center_freq(freq_offset)
+
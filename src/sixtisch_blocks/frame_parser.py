@@ -0,0 +1,53 @@
+from collections import namedtuple
+from .crc import crc16
+
+FRAME_TYPE_NAMES = {0: "Beacon", 1: "Data", 2: "ACK", 3: "MAC Command"}
+ADDR_MODE_NAMES = {0: "None", 2: "Short (16-bit)", 3: "Long (64-bit)"}
+ADDR_MODE_BYTES = {2: 2, 3: 8}
+
+FrameRecord = namedtuple("FrameRecord", [
+    "sfd", "phr", "frame_type", "ack_request", "dest_mode", "src_mode",
+    "seq", "pan_id", "dest_addr", "src_addr", "payload", "crc_rx", "crc_ok",
+    "bit_offset", "time_ns",
+])
+
+
+def parse_fcf(fcf_bytes):
+    fcf_val = int.from_bytes(fcf_bytes, 'little')
+    frame_type = fcf_val & 0b111
+    ack_request = (fcf_val >> 5) & 1
+    dest_addr_mode = (fcf_val >> 10) & 3
+    src_addr_mode = (fcf_val >> 14) & 3
+    return frame_type, ack_request, dest_addr_mode, src_addr_mode
+
+
+def extract_addresses(payload, dest_mode, src_mode):
+    idx = 2
+    seq = payload[idx:idx+1]
+    idx += 1
+    pan = payload[idx:idx+2][::-1]
+    idx += 2
+    dest_len = ADDR_MODE_BYTES.get(dest_mode, 0)
+    dest = payload[idx:idx+dest_len][::-1]
+    idx += dest_len
+    src = payload[idx:idx+ADDR_MODE_BYTES.get(src_mode, 0)][::-1]
+    return seq, pan, dest, src
+
+
+def parse_frame(sfd, frame, bit_offset=0, time_ns=0):
+    frame = bytes(frame)
+    phr = frame[0]
+    payload = frame[1:-2]
+    crc_rx = int.from_bytes(frame[-2:], 'big')
+    crc_ok = crc16(frame[:-2]) == crc_rx
+    frame_type = ack = dest_mode = src_mode = None
+    seq = pan = dest = src = b""
+    if len(payload) >= 2:
+        frame_type, ack, dest_mode, src_mode = parse_fcf(payload[:2])
+        seq, pan, dest, src = extract_addresses(payload, dest_mode, src_mode)
+    return FrameRecord(sfd, phr, frame_type, ack, dest_mode, src_mode,
+                       seq, pan, dest, src, payload, crc_rx, crc_ok, bit_offset, time_ns)
+
+
+def parse_frames(frames):
+    return [parse_frame(*f) for f in frames]
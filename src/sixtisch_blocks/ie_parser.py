@@ -0,0 +1,205 @@
+from collections import namedtuple
+from .frame_parser import ADDR_MODE_BYTES
+
+FrameControl = namedtuple("FrameControl", [
+    "frame_type", "security", "frame_pending", "ack_request", "pan_id_compression",
+    "seq_suppression", "ie_present", "dest_mode", "version", "src_mode",
+])
+MacHeader = namedtuple("MacHeader", [
+    "fc", "seq", "dest_pan", "dest_addr", "src_pan", "src_addr", "security_level", "length",
+])
+TschInfo = namedtuple("TschInfo", [
+    "asn", "join_metric", "timeslot_template", "tx_offset_us", "timeslot_length_us",
+    "hopping_sequence_id", "hopping_sequence", "slotframes",
+])
+Slotframe = namedtuple("Slotframe", ["handle", "size", "links"])
+Link = namedtuple("Link", ["timeslot", "channel_offset", "options"])
+
+MIC_LENGTHS = {0: 0, 1: 4, 2: 8, 3: 16, 4: 0, 5: 4, 6: 8, 7: 16}
+KEY_ID_LENGTHS = {0: 0, 1: 1, 2: 5, 3: 9}
+
+HEADER_IE_HT1 = 0x7E
+HEADER_IE_HT2 = 0x7F
+PAYLOAD_IE_MLME = 0x1
+PAYLOAD_IE_TERMINATION = 0xF
+SUB_IE_TSCH_SYNC = 0x1A
+SUB_IE_SLOTFRAME_LINK = 0x1B
+SUB_IE_TIMESLOT = 0x1C
+SUB_IE_CHANNEL_HOPPING = 0x9
+
+
+def parse_frame_control(fcf_bytes):
+    v = int.from_bytes(fcf_bytes, 'little')
+    return FrameControl(v & 0b111, (v >> 3) & 1, (v >> 4) & 1, (v >> 5) & 1, (v >> 6) & 1,
+                        (v >> 8) & 1, (v >> 9) & 1, (v >> 10) & 3, (v >> 12) & 3, (v >> 14) & 3)
+
+
+def pan_ids_present(fc):
+    dest, src = fc.dest_mode != 0, fc.src_mode != 0
+    if fc.version < 2:
+        return dest, src and not (fc.pan_id_compression and dest)
+    # IEEE 802.15.4-2015, table 7-2
+    if dest and src:
+        both_long = fc.dest_mode == 3 and fc.src_mode == 3
+        if fc.pan_id_compression:
+            return not both_long, False
+        return True, not both_long
+    if dest or src:
+        return dest and not fc.pan_id_compression, src and not fc.pan_id_compression
+    return bool(fc.pan_id_compression), False
+
+
+def parse_mhr(payload):
+    # Walks the MAC header up to the first IE (or the MAC payload) and returns its length. Address
+    # fields are in display order like FrameRecord; None if the frame is too short.
+    if len(payload) < 2:
+        return None
+    fc = parse_frame_control(payload[:2])
+    idx = 2
+    seq = None
+    if not (fc.seq_suppression and fc.version == 2):
+        seq = payload[idx:idx+1]
+        idx += 1
+    dest_pan_present, src_pan_present = pan_ids_present(fc)
+    fields = []
+    for present, n in ((dest_pan_present, 2), (True, ADDR_MODE_BYTES.get(fc.dest_mode, 0)),
+                       (src_pan_present, 2), (True, ADDR_MODE_BYTES.get(fc.src_mode, 0))):
+        n = n if present else 0
+        fields.append(payload[idx:idx+n][::-1])
+        idx += n
+    security_level = 0
+    if fc.security:
+        if idx >= len(payload):
+            return None
+        sec_control = payload[idx]
+        security_level = sec_control & 0b111
+        idx += 1
+        if not (fc.version == 2 and sec_control & 0x20):
+            idx += 4
+        idx += KEY_ID_LENGTHS[(sec_control >> 3) & 3]
+    if idx > len(payload):
+        return None
+    return MacHeader(fc, seq, *fields, security_level, idx)
+
+
+def parse_header_ies(payload, idx, end):
+    ies = []
+    payload_ies = False
+    while idx + 2 <= end:
+        desc = int.from_bytes(payload[idx:idx+2], 'little')
+        length, element_id = desc & 0x7F, (desc >> 7) & 0xFF
+        idx += 2
+        if element_id in (HEADER_IE_HT1, HEADER_IE_HT2):
+            payload_ies = element_id == HEADER_IE_HT1
+            break
+        ies.append((element_id, payload[idx:idx+length]))
+        idx += length
+    return ies, payload_ies, idx
+
+
+def parse_payload_ies(payload, idx, end):
+    ies = []
+    while idx + 2 <= end:
+        desc = int.from_bytes(payload[idx:idx+2], 'little')
+        length, group_id = desc & 0x7FF, (desc >> 11) & 0xF
+        idx += 2
+        if group_id == PAYLOAD_IE_TERMINATION:
+            break
+        ies.append((group_id, payload[idx:min(idx+length, end)]))
+        idx += length
+    return ies
+
+
+def parse_mlme_sub_ies(content):
+    sub_ies = []
+    idx = 0
+    while idx + 2 <= len(content):
+        desc = int.from_bytes(content[idx:idx+2], 'little')
+        if desc & 0x8000:
+            length, sub_id = desc & 0x7FF, (desc >> 11) & 0xF
+        else:
+            length, sub_id = desc & 0xFF, (desc >> 8) & 0x7F
+        idx += 2
+        sub_ies.append((sub_id, bool(desc & 0x8000), content[idx:idx+length]))
+        idx += length
+    return sub_ies
+
+
+def parse_tsch_sync(content):
+    return int.from_bytes(content[:5], 'little'), content[5] if len(content) > 5 else None
+
+
+def parse_timeslot(content):
+    template_id = content[0] if content else None
+    tx_offset = timeslot_length = None
+    if len(content) >= 25:
+        tx_offset = int.from_bytes(content[5:7], 'little')
+        timeslot_length = int.from_bytes(content[-3:] if len(content) >= 27 else content[-2:], 'little')
+    return template_id, tx_offset, timeslot_length
+
+
+def parse_channel_hopping(content):
+    sequence_id = content[0] if content else None
+    if len(content) < 12:
+        return sequence_id, None
+    # Page, channel count and PHY configuration are followed by an extended bitmap whose length
+    # depends on the PHY, so find the hopping sequence length field that accounts for the rest.
+    for bitmap_len in range(len(content) - 11):
+        idx = 8 + bitmap_len
+        seq_len = int.from_bytes(content[idx:idx+2], 'little')
+        if idx + 2 + 2 * seq_len + 2 == len(content):
+            idx += 2
+            return sequence_id, [int.from_bytes(content[i:i+2], 'little') for i in range(idx, idx + 2 * seq_len, 2)]
+    return sequence_id, None
+
+
+def parse_slotframe_link(content):
+    slotframes = []
+    idx = 1
+    for _ in range(content[0] if content else 0):
+        if idx + 4 > len(content):
+            break
+        handle, size, n_links = content[idx], int.from_bytes(content[idx+1:idx+3], 'little'), content[idx+3]
+        idx += 4
+        links = []
+        for _ in range(n_links):
+            if idx + 5 > len(content):
+                break
+            links.append(Link(int.from_bytes(content[idx:idx+2], 'little'),
+                              int.from_bytes(content[idx+2:idx+4], 'little'), content[idx+4]))
+            idx += 5
+        slotframes.append(Slotframe(handle, size, links))
+    return slotframes
+
+
+def parse_ies(payload):
+    # Returns (header IEs, payload IEs) as lists of (id, content). Payload IEs of encrypted frames
+    # are left out because only the MIC-only security levels keep them in the clear.
+    mhr = parse_mhr(payload)
+    if mhr is None or not mhr.fc.ie_present:
+        return [], []
+    end = len(payload) - MIC_LENGTHS[mhr.security_level]
+    header_ies, payload_ies_follow, idx = parse_header_ies(payload, mhr.length, end)
+    if not payload_ies_follow or mhr.security_level >= 4:
+        return header_ies, []
+    return header_ies, parse_payload_ies(payload, idx, end)
+
+
+def parse_tsch_ies(payload):
+    _, payload_ies = parse_ies(payload)
+    info = {}
+    for group_id, content in payload_ies:
+        if group_id != PAYLOAD_IE_MLME:
+            continue
+        for sub_id, long_form, sub in parse_mlme_sub_ies(content):
+            if not long_form and sub_id == SUB_IE_TSCH_SYNC and len(sub) >= 5:
+                info["asn"], info["join_metric"] = parse_tsch_sync(sub)
+            elif not long_form and sub_id == SUB_IE_TIMESLOT:
+                info["timeslot_template"], info["tx_offset_us"], info["timeslot_length_us"] = parse_timeslot(sub)
+            elif long_form and sub_id == SUB_IE_CHANNEL_HOPPING:
+                info["hopping_sequence_id"], info["hopping_sequence"] = parse_channel_hopping(sub)
+            elif not long_form and sub_id == SUB_IE_SLOTFRAME_LINK:
+                info["slotframes"] = parse_slotframe_link(sub)
+    if "asn" not in info:
+        return None
+    return TschInfo(**{field: info.get(field) for field in TschInfo._fields})
@@ -0,0 +1,20 @@
+from gnuradio import gr
+import numpy as np
+
+WORK_DONE = -1
+
+
+class MmapIQSource(gr.sync_block):
+    def __init__(self, path):
+        gr.sync_block.__init__(self, name="Mmap IQ Source", in_sig=None, out_sig=[np.complex64])
+        self.data = np.memmap(path, dtype=np.complex64, mode='r')
+        self.pos = 0
+
+    def work(self, input_items, output_items):
+        out = output_items[0]
+        n = min(len(out), len(self.data) - self.pos)
+        if n <= 0:
+            return WORK_DONE
+        out[:n] = self.data[self.pos:self.pos+n]
+        self.pos += n
+        return n
@@ -1,222 +1,204 @@
 from gnuradio import gr
 import numpy as np
-import sqlite3
-import threading
-import queue
-from datetime import datetime
+import pmt
+import time
 import atexit
+from collections import deque
+from .console import get_console
+from .crc import crc16
+from .db_writer import get_writer
+from .dedup import DUPLICATE, RETRANSMISSION, get_correlator
+from .decoder import FrameDecoder, get_stream_clock
+from .decoder_pool import get_decoder_pool
+from .pcap import get_pcap_writer
+from .stats import SegmenterStats, register_source
+from .storage import SCHEMAS, ROW_BUILDERS, table_name, insert_sql, init_table, write_summary
 
 DB_PATH = "/home/konrad/6TiSCH-packet-sniffer/data/Database.db"
+STATS_PUBLISH_INTERVAL_S = 1.0
+MAX_PENDING_FRAMES = 64
 
-class PacketSegmenter(gr.sync_block):
-    def __init__(self, access_code='1001000001001110', tag_name='Sync Word', threshold=0, channel="default"):
-        gr.sync_block.__init__(self, name="Packet Segmenter", in_sig=[np.uint8], out_sig=[np.uint8])
-        self.access_code = np.array([int(b) for b in str(access_code).strip()], dtype=np.uint8)
-        self.code_len = len(self.access_code)
-        self.threshold = int(threshold)
-        self.buffer = np.array([], dtype=np.uint8)
-        self.bitrate = 50_000
+
+class _SegmenterBase:
+    def _setup(self, access_code, tag_name, threshold, channel, max_frame_len, db_path, schema, pcap_path, packed_input, time_base):
+        if schema not in SCHEMAS:
+            raise ValueError(f"Unknown schema: {schema}")
+        self.tag_name = str(tag_name)
+        self.stats = SegmenterStats()
+        # Segmenters with the same time_base share bit 0, so their frame times can be compared (dedup).
+        clock = get_stream_clock(time_base) if time_base else None
+        self.core = FrameDecoder(access_code, threshold, max_frame_len, packed_input, stats=self.stats, clock=clock)
+        self.code_len = self.core.code_len
+        self.packed_input = self.core.packed_input
+        self.bitrate = self.core.bitrate
+        self.rx_time_key = pmt.intern("rx_time")
         self.channel = str(channel)
-        self.table_name = "packets_" + "".join(c if c.isalnum() or c == "_" else "_" for c in self.channel)
-        self.db_queue = queue.Queue()
-        self.db_thread = threading.Thread(target=self._db_worker, daemon=True)
-        self.db_thread.start()
-        self._init_db()
+        self.table_name = table_name(self.channel)
+        self.insert_sql = insert_sql(self.table_name)
+        self.schema = schema
+        self.make_row = ROW_BUILDERS[schema]
+        self.db_path = db_path
+        self.db = get_writer(db_path) if db_path else None
+        if self.db is not None:
+            init_table(self.db, self.table_name, schema)
+        self.pcap = get_pcap_writer(pcap_path) if pcap_path else None
+        self.console = get_console()
+        self.correlator = get_correlator()
+        self.decoder = get_decoder_pool()
+        self.decoder_lane = self.decoder.register()
+        self.listeners = []
         self.packet_count = 0
         self.total_packet_time_ms = 0.0
+        self._stats_published = time.monotonic()
+        self.message_port_register_out(pmt.intern("stats"))
+        register_source(f"segmenter:{self.channel}", self.get_stats)
         atexit.register(self._print_final_report)
 
-    def _init_db(self):
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        cursor.execute(f'DROP TABLE IF EXISTS {self.table_name}')
-        cursor.execute(f'''
-            CREATE TABLE {self.table_name} (
-                Timestamp TEXT,
-                SFD TEXT,
-                PHR TEXT,
-                FrameType TEXT,
-                AckRequest INTEGER,
-                DestAddrMode TEXT,
-                SrcAddrMode TEXT,
-                SeqNum TEXT,
-                PAN_ID TEXT,
-                DestAddr TEXT,
-                SrcAddr TEXT,
-                PSDU TEXT,
-                CRC_16 TEXT,
-                CRC_Check INTEGER,
-                PacketDuration_ms REAL
-            )
-        ''')
-        conn.commit()
-        conn.close()
-
-    def _db_worker(self):
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        while True:
-            row = self.db_queue.get()
-            cursor.execute(
-                f"INSERT INTO {self.table_name} VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?,?)",
-                row
-            )
-            conn.commit()
-            self.db_queue.task_done()
-
-    def _bits_to_hex(self, bits):
-        if len(bits) == 0:
-            return ""
-        val = int(''.join(map(str, bits.tolist())), 2)
-        width = ((len(bits) + 7) // 8) * 2
-        return f"{val:0{width}X}"
-
-    def _bits_to_bytes_msb(self, bits):
-        n = len(bits) // 8
-        out = bytearray(n)
-        for i in range(n):
-            b = 0
-            for j in range(8):
-                b = (b << 1) | bits[i*8 + j]
-            out[i] = b
-        return out
-
-    def _clean_hex(self, hex_string):
-        while hex_string.startswith("00") and len(hex_string) > 2:
-            hex_string = hex_string[2:]
-        return hex_string.upper()
-
-    def _reverse_bytes_hex(self, hex_str):
-        hex_str = hex_str.upper()
-        if len(hex_str) % 2 != 0:
-            hex_str = '0' + hex_str
-        return ''.join([hex_str[i:i+2] for i in range(0, len(hex_str), 2)][::-1])
-
-    def _parse_fcf(self, fcf_bits):
-        fcf_val = int(''.join(map(str, fcf_bits.tolist())), 2)
-        fcf_bytes = fcf_val.to_bytes(2, 'big')[::-1]
-        fcf_val = int.from_bytes(fcf_bytes, 'big')
-        frame_type = fcf_val & 0b111
-        ack_request = (fcf_val >> 5) & 1
-        dest_addr_mode = (fcf_val >> 10) & 3
-        src_addr_mode = (fcf_val >> 14) & 3
-        frame_type_map = {0:"Beacon",1:"Data",2:"ACK",3:"MAC Command"}
-        addr_mode_map = {0:"None",2:"Short (16-bit)",3:"Long (64-bit)"}
-        return frame_type_map.get(frame_type,"Unknown"), ack_request, addr_mode_map.get(dest_addr_mode,"Unknown"), addr_mode_map.get(src_addr_mode,"Unknown"), dest_addr_mode, src_addr_mode
-
-    def _extract_addresses(self, psdu_bits, dest_mode, src_mode):
-        idx = 16
-        seq_bits = psdu_bits[idx:idx+8]
-        idx += 8
-        pan_hex = self._reverse_bytes_hex(self._bits_to_hex(psdu_bits[idx:idx+16]))
-        idx += 16
-        dest_hex = ""
-        if dest_mode == 2:
-            dest_hex = self._reverse_bytes_hex(self._bits_to_hex(psdu_bits[idx:idx+16]))
-            idx += 16
-        elif dest_mode == 3:
-            dest_hex = self._reverse_bytes_hex(self._bits_to_hex(psdu_bits[idx:idx+64]))
-            idx += 64
-        src_hex = ""
-        if src_mode == 2:
-            src_hex = self._reverse_bytes_hex(self._bits_to_hex(psdu_bits[idx:idx+16]))
-        elif src_mode == 3:
-            src_hex = self._reverse_bytes_hex(self._bits_to_hex(psdu_bits[idx:idx+64]))
-        return seq_bits, pan_hex, dest_hex, src_hex
-
-    def _crc16(self, data):
-        crc = 0x1D0F
-        for b in data:
-            crc ^= (b << 8)
-            for _ in range(8):
-                if crc & 0x8000:
-                    crc = ((crc << 1) ^ 0x1021) & 0xFFFF
-                else:
-                    crc = (crc << 1) & 0xFFFF
-        return crc ^ 0xFFFF
-
     def _print_final_report(self):
-        total_time_s = self.total_packet_time_ms / 1000
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS sniff_summary (
-                Channel TEXT PRIMARY KEY,
-                TotalPackets INTEGER,
-                TotalTime_s REAL
-            )
-        ''')
-
-        cursor.execute('''
-            INSERT INTO sniff_summary (Channel, TotalPackets, TotalTime_s)
-            VALUES (?, ?, ?)
-            ON CONFLICT(Channel) DO UPDATE SET
-                TotalPackets=excluded.TotalPackets,
-                TotalTime_s=excluded.TotalTime_s
-        ''', (self.channel, self.packet_count, total_time_s))
-        conn.commit()
-        conn.close()
-
-    def _save_to_db(self, sfd_bits, phr_bits, psdu_bits):
-        sfd_hex = self._bits_to_hex(sfd_bits)
-        phr_hex = self._bits_to_hex(phr_bits)
-        payload_bits = psdu_bits[:-16]
-        crc_bits = psdu_bits[-16:]
-        payload_bytes = self._bits_to_bytes_msb(payload_bits)
-        crc_rx = self._bits_to_hex(crc_bits)
-        data_with_len = bytes([len(payload_bytes)]) + payload_bytes
-        crc_check = int(f"{self._crc16(data_with_len):04X}" == crc_rx)
-        frame_type = ack = dest_addr_str = src_addr_str = ""
-        seq_hex = pan_hex = dest_hex = src_hex = ""
-        if len(payload_bits) >= 16:
-            frame_type, ack, dest_addr_str, src_addr_str, dest_mode, src_mode = self._parse_fcf(payload_bits[:16])
-            seq_bits, pan_hex, dest_hex, src_hex = self._extract_addresses(payload_bits, dest_mode, src_mode)
-            seq_hex = self._bits_to_hex(seq_bits)
-        packet_bits = len(sfd_bits) + len(phr_bits) + len(psdu_bits)
-        packet_duration_ms = (packet_bits / self.bitrate) * 1000
+        self.decoder.flush()
+        if self.db is not None:
+            write_summary(self.db, self.channel, self.packet_count, self.total_packet_time_ms / 1000)
+
+    def add_listener(self, listener):
+        self.listeners.append(listener)
+
+    def decoder_queue_depth(self):
+        return self.decoder.qsize(self.decoder_lane)
+
+    def get_stats(self):
+        stats = self.stats.to_dict()
+        stats["db_queue_depth"] = self.db.qsize() if self.db is not None else 0
+        stats["decoder_queue_depth"] = self.decoder_queue_depth()
+        return stats
+
+    def _publish_stats(self):
+        now = time.monotonic()
+        if now - self._stats_published >= STATS_PUBLISH_INTERVAL_S:
+            self._stats_published = now
+            self.message_port_pub(pmt.intern("stats"), pmt.to_pmt(self.get_stats()))
+
+    def _save_to_db(self, record):
+        self.stats.frames += 1
+        if record.crc_ok:
+            self.stats.crc_pass += 1
+        else:
+            self.stats.crc_fail += 1
+        packet_duration_ms = (self.core.frame_bits(len(record.payload)) / self.bitrate) * 1000
         self.packet_count += 1
         self.total_packet_time_ms += packet_duration_ms
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")
-        print(f"{timestamp:26} | {frame_type:12} | {'VALID' if crc_check else 'INVALID':8} | {seq_hex:4} | {dest_hex:17} | {src_hex:17} | {pan_hex:6}")
-        self.db_queue.put((
-            timestamp,
-            sfd_hex,
-            phr_hex,
-            frame_type,
-            ack,
-            dest_addr_str,
-            src_addr_str,
-            seq_hex,
-            pan_hex,
-            dest_hex,
-            src_hex,
-            payload_bytes.hex().upper(),
-            crc_rx,
-            crc_check,
-            packet_duration_ms
-        ))
+        copy = self.correlator.classify(self.channel, record)
+        if copy == DUPLICATE:
+            self.stats.duplicates += 1
+        elif copy == RETRANSMISSION:
+            self.stats.retransmissions += 1
+        if copy != DUPLICATE:
+            for listener in self.listeners:
+                listener(self.channel, record)
+        if self.correlator.suppress(copy):
+            self.stats.suppressed += 1
+            return
+        if self.pcap is not None:
+            self.pcap.write(record.time_ns, record.payload)
+        self.console.put(self.channel, record)
+        if self.db is not None:
+            self.db.put(self.insert_sql, self.make_row(record, packet_duration_ms, self.core.sfd_width, copy))
+
+    def _update_anchor(self, n_items):
+        # Frame timestamps are derived from the bit index, anchored to every rx_time tag (from the
+        # source or a SquelchGate in front of the demodulator) or, without any, to the wall clock when
+        # the first input arrived (or to the shared time_base clock).
+        for tag in self.get_tags_in_window(0, 0, n_items, self.rx_time_key):
+            secs, frac = pmt.to_python(tag.value)
+            self.core.set_anchor(int(secs) * 1_000_000_000 + round(frac * 1e9),
+                                 tag.offset * (8 if self.packed_input else 1))
+
+    def _emit(self, sfd, frame, bit_offset, time_ns):
+        self.decoder.submit(self.decoder_lane, self._save_to_db, (sfd, frame, bit_offset, time_ns))
+
+    def _consume(self, in0):
+        t0 = time.perf_counter_ns()
+        self._update_anchor(len(in0))
+        for frame in self.core.search(in0):
+            self._emit(*frame)
+        self.stats.work_calls += 1
+        self.stats.work_latency_us.add((time.perf_counter_ns() - t0) / 1000)
+        self._publish_stats()
+
+
+class PacketSegmenter(_SegmenterBase, gr.sync_block):
+    def __init__(self, access_code='1001000001001110', tag_name='Sync Word', threshold=0, channel="default", max_frame_len=127, db_path=DB_PATH, schema="text", pcap_path="", packed_input=False, time_base=""):
+        gr.sync_block.__init__(self, name="Packet Segmenter", in_sig=[np.uint8], out_sig=[np.uint8])
+        self._setup(access_code, tag_name, threshold, channel, max_frame_len, db_path, schema, pcap_path, packed_input, time_base)
+
+    def work(self, input_items, output_items):
+        in0 = input_items[0]
+        self._consume(in0)
+        output_items[0][:len(in0)] = in0
+        return len(in0)
+
+
+class PacketSegmenterSink(_SegmenterBase, gr.sync_block):
+    def __init__(self, access_code='1001000001001110', tag_name='Sync Word', threshold=0, channel="default", max_frame_len=127, db_path=DB_PATH, schema="text", pcap_path="", packed_input=False, time_base=""):
+        gr.sync_block.__init__(self, name="Packet Segmenter Sink", in_sig=[np.uint8], out_sig=None)
+        self._setup(access_code, tag_name, threshold, channel, max_frame_len, db_path, schema, pcap_path, packed_input, time_base)
 
     def work(self, input_items, output_items):
-        in0 = input_items[0].astype(np.uint8)
+        self._consume(input_items[0])
+        return len(input_items[0])
+
+
+class PacketSegmenterTagged(_SegmenterBase, gr.basic_block):
+    # Emits the MAC payload (PSDU without FCS) of every frame as packed bytes. The first byte of each
+    # frame carries a "packet_len" tag for tagged-stream blocks and a tag_name tag with the frame metadata.
+    def __init__(self, access_code='1001000001001110', tag_name='Sync Word', threshold=0, channel="default", max_frame_len=127, db_path=DB_PATH, schema="text", pcap_path="", packed_input=False, time_base=""):
+        gr.basic_block.__init__(self, name="Packet Segmenter (tagged)", in_sig=[np.uint8], out_sig=[np.uint8])
+        self._setup(access_code, tag_name, threshold, channel, max_frame_len, db_path, schema, pcap_path, packed_input, time_base)
+        self.set_tag_propagation_policy(gr.TPP_DONT)
+        self.message_port_register_out(pmt.intern("pdus"))
+        self.tag_key = pmt.intern(self.tag_name)
+        self.length_key = pmt.intern("packet_len")
+        self.pending = deque()
+        self.pending_sent = 0
+
+    def forecast(self, noutput_items, ninputs):
+        return [1] * ninputs
+
+    def _emit(self, sfd, frame, bit_offset, time_ns):
+        super()._emit(sfd, frame, bit_offset, time_ns)
+        payload = frame[1:-2]
+        crc_ok = crc16(frame[:-2]) == int.from_bytes(frame[-2:], 'big')
+        meta = pmt.make_dict()
+        meta = pmt.dict_add(meta, pmt.intern("channel"), pmt.intern(self.channel))
+        meta = pmt.dict_add(meta, pmt.intern("length"), pmt.from_long(len(payload)))
+        meta = pmt.dict_add(meta, pmt.intern("crc_ok"), pmt.from_bool(crc_ok))
+        meta = pmt.dict_add(meta, pmt.intern("sfd"), pmt.from_long(sfd))
+        meta = pmt.dict_add(meta, pmt.intern("bit_offset"), pmt.from_uint64(bit_offset))
+        self.message_port_pub(pmt.intern("pdus"), pmt.cons(meta, pmt.init_u8vector(len(payload), list(payload))))
+        if payload:
+            self.pending.append((payload, meta))
+
+    def _drain(self, out, produced):
+        while self.pending and produced < len(out):
+            payload, meta = self.pending[0]
+            if self.pending_sent == 0:
+                offset = self.nitems_written(0) + produced
+                self.add_item_tag(0, offset, self.length_key, pmt.from_long(len(payload)))
+                self.add_item_tag(0, offset, self.tag_key, meta)
+            k = min(len(out) - produced, len(payload) - self.pending_sent)
+            out[produced:produced+k] = np.frombuffer(payload, dtype=np.uint8, count=k, offset=self.pending_sent)
+            produced += k
+            self.pending_sent += k
+            if self.pending_sent == len(payload):
+                self.pending.popleft()
+                self.pending_sent = 0
+        return produced
+
+    def general_work(self, input_items, output_items):
         out = output_items[0]
-        self.buffer = np.concatenate((self.buffer, in0))
-        i = 0
-        while len(self.buffer) - i >= self.code_len + 8:
-            if np.count_nonzero(self.buffer[i:i+self.code_len] ^ self.access_code) <= self.threshold:
-                phr_bits = self.buffer[i+self.code_len:i+self.code_len+8]
-                psdu_len = int(''.join(map(str, phr_bits.tolist())), 2)
-                total_bits = self.code_len + 8 + (psdu_len + 2) * 8
-                if len(self.buffer) >= i + total_bits:
-                    pkt = self.buffer[i:i+total_bits]
-                    self._save_to_db(
-                        pkt[:self.code_len],
-                        pkt[self.code_len:self.code_len+8],
-                        pkt[self.code_len+8:]
-                    )
-                    i += total_bits
-                    continue
-                break
-            i += 1
-        self.buffer = self.buffer[i:]
-        out[:len(in0)] = in0
-        return len(out)
+        produced = self._drain(out, 0)
+        if len(self.pending) < MAX_PENDING_FRAMES:
+            in0 = input_items[0]
+            self._consume(in0)
+            self.consume(0, len(in0))
+            produced = self._drain(out, produced)
+        return produced
@@ -0,0 +1,84 @@
+import atexit
+import struct
+import threading
+import time
+from .segments import get_segment_manager
+
+PCAP_MAGIC_NS = 0xA1B23C4D
+LINKTYPE_IEEE802_15_4_WITHFCS = 195
+LINKTYPE_IEEE802_15_4_NOFCS = 230
+
+_writers = {}
+_writers_lock = threading.Lock()
+
+
+class PcapWriter:
+    def __init__(self, path, linktype=LINKTYPE_IEEE802_15_4_NOFCS, snaplen=65535, flush_interval=1.0, segments=None):
+        self.path = path
+        self.linktype = linktype
+        self.snaplen = snaplen
+        self.flush_interval = flush_interval
+        self.segments = segments
+        self.segment_id = None
+        self.frames = 0
+        self._lock = threading.Lock()
+        self._last_flush = time.monotonic()
+        self._open()
+
+    def _open(self):
+        if self.segments is not None:
+            self.segment_id = self.segments.segment_id
+            self.path = self.segments.path(".pcap")
+        # Without rotation every run uses the same file, so earlier captures are appended to.
+        header = struct.pack("<IHHiIII", PCAP_MAGIC_NS, 2, 4, 0, 0, self.snaplen, self.linktype)
+        self.file = open(self.path, "ab")
+        if self.file.tell() == 0:
+            self.file.write(header)
+            return
+        with open(self.path, "rb") as f:
+            existing = f.read(len(header))
+        if existing[:8] != header[:8] or existing[20:] != header[20:]:
+            self.file.close()
+            raise ValueError(f"{self.path} is not a nanosecond pcap with link type {self.linktype}")
+
+    def _reopen(self):
+        self.file.close()
+        self.segments.release(self.path)
+        self._open()
+
+    def write(self, timestamp_ns, data):
+        data = bytes(data[:self.snaplen])
+        sec, nsec = divmod(int(timestamp_ns), 1_000_000_000)
+        record = struct.pack("<IIII", sec, nsec, len(data), len(data)) + data
+        with self._lock:
+            if self.file.closed:
+                return
+            # The DB writer may have rotated in the meantime; every frame goes to the current segment.
+            if self.segments is not None and self.segments.segment_id != self.segment_id:
+                self._reopen()
+            self.file.write(record)
+            self.frames += 1
+            now = time.monotonic()
+            if now - self._last_flush >= self.flush_interval:
+                self.file.flush()
+                self._last_flush = now
+                if self.segments is not None and self.segments.maybe_rotate():
+                    self._reopen()
+
+    def close(self):
+        with self._lock:
+            if not self.file.closed:
+                self.file.close()
+                if self.segments is not None:
+                    self.segments.release(self.path)
+
+
+def get_pcap_writer(path, linktype=LINKTYPE_IEEE802_15_4_NOFCS):
+    with _writers_lock:
+        writer = _writers.get(path)
+        if writer is None:
+            writer = _writers[path] = PcapWriter(path, linktype, segments=get_segment_manager(path))
+            atexit.register(writer.close)
+        elif writer.linktype != linktype:
+            raise ValueError(f"{path} is already open with link type {writer.linktype}")
+        return writer
@@ -0,0 +1,184 @@
+import atexit
+import json
+import os
+import sys
+import threading
+import time
+from .stats import register_source
+
+STORAGE_DEFAULTS = {
+    "rotate_interval": 0.0,
+    "rotate_bytes": 0,
+    "retention_bytes": 0,
+}
+
+_managers = {}
+_managers_lock = threading.Lock()
+
+
+def _file_bytes(path):
+    total = 0
+    for p in (path, path + "-wal"):
+        try:
+            total += os.path.getsize(p)
+        except OSError:
+            pass
+    return total
+
+
+class SegmentManager:
+    # Splits one capture (e.g. out/capture.db + out/capture.pcap) into segments named
+    # out/capture-<seq>-<start>.db/.pcap, listed in out/capture.manifest.json. seq counts every segment
+    # the capture ever had (kept in the manifest), so names are never reused and sort chronologically
+    # even after retention deleted older ones. Writers call path() for their
+    # current file, maybe_rotate() from their own thread, reopen when segment_id changes and release()
+    # the files they closed. Retention never deletes a file that is still open.
+    def __init__(self, base_path, rotate_interval=0.0, rotate_bytes=0, retention_bytes=0):
+        self.directory = os.path.dirname(base_path) or "."
+        self.stem = os.path.splitext(os.path.basename(base_path))[0]
+        self.rotate_interval = float(rotate_interval)
+        self.rotate_bytes = int(rotate_bytes)
+        self.retention_bytes = int(retention_bytes)
+        self.manifest_path = os.path.join(self.directory, f"{self.stem}.manifest.json")
+        self.segment_id = 0
+        self.rotations = 0
+        self.deleted = 0
+        self._open_files = set()
+        self._lock = threading.Lock()
+        self._closed = False
+        os.makedirs(self.directory, exist_ok=True)
+        self.segments, self.next_seq = self._load_manifest()
+        self._open_segment()
+
+    def _load_manifest(self):
+        try:
+            with open(self.manifest_path) as f:
+                manifest = json.load(f)
+            segments = manifest["segments"]
+        except (OSError, ValueError, KeyError):
+            return [], 1
+        for segment in segments:
+            if segment["end_ns"] is None:
+                # Left open by a run that did not shut down cleanly.
+                mtimes = [os.path.getmtime(p) for p in self._files(segment) if os.path.exists(p)]
+                segment["end_ns"] = int(max(mtimes, default=segment["start_ns"] / 1e9) * 1e9)
+        return segments, manifest.get("next_seq", len(segments) + 1)
+
+    def _write_manifest(self):
+        for segment in self.segments:
+            segment["bytes"] = sum(_file_bytes(p) for p in self._files(segment))
+        tmp = f"{self.manifest_path}.tmp"
+        try:
+            with open(tmp, "w") as f:
+                json.dump({"stem": self.stem, "next_seq": self.next_seq, "segments": self.segments}, f, indent=2)
+            os.replace(tmp, self.manifest_path)
+        except OSError as exc:
+            print(f"Storage: cannot write {self.manifest_path}: {exc}", file=sys.stderr)
+
+    def _files(self, segment):
+        return [os.path.join(self.directory, segment["name"] + ext) for ext in segment["files"]]
+
+    def _open_segment(self):
+        start_ns = time.time_ns()
+        stamp = time.strftime('%Y%m%d-%H%M%S', time.localtime(start_ns / 1e9))
+        existing = {segment["name"] for segment in self.segments}
+        while True:
+            name = f"{self.stem}-{self.next_seq:06d}-{stamp}"
+            self.next_seq += 1
+            # Files of the same name can only be left over from a lost manifest.
+            if name not in existing and not any(os.path.exists(os.path.join(self.directory, name + ext))
+                                                for ext in (".db", ".pcap")):
+                break
+        self.current = {"name": name, "files": [], "start_ns": start_ns, "end_ns": None, "bytes": 0}
+        self.segments.append(self.current)
+        self.segment_id += 1
+        self._write_manifest()
+
+    def path(self, ext):
+        with self._lock:
+            if ext not in self.current["files"]:
+                self.current["files"].append(ext)
+                self._write_manifest()
+            path = os.path.join(self.directory, self.current["name"] + ext)
+            self._open_files.add(path)
+            return path
+
+    def release(self, path):
+        with self._lock:
+            self._open_files.discard(path)
+            self._enforce_retention()
+
+    def _due(self):
+        if self.rotate_interval and time.time_ns() - self.current["start_ns"] >= self.rotate_interval * 1e9:
+            return True
+        return bool(self.rotate_bytes) and sum(_file_bytes(p) for p in self._files(self.current)) >= self.rotate_bytes
+
+    def maybe_rotate(self):
+        with self._lock:
+            if self._closed or not self._due():
+                return False
+            self.current["end_ns"] = time.time_ns()
+            self.rotations += 1
+            self._open_segment()
+            self._enforce_retention()
+            return True
+
+    def _enforce_retention(self):
+        if not self.retention_bytes:
+            return
+        sizes = [sum(_file_bytes(p) for p in self._files(segment)) for segment in self.segments]
+        total = sum(sizes)
+        kept = []
+        for segment, size in zip(self.segments, sizes):
+            files = self._files(segment)
+            if total <= self.retention_bytes or segment is self.current or self._open_files.intersection(files):
+                kept.append(segment)
+                continue
+            for p in files:
+                for f in (p, p + "-wal", p + "-shm"):
+                    try:
+                        os.remove(f)
+                    except OSError:
+                        pass
+            total -= size
+            self.deleted += 1
+        self.segments = kept
+        self._write_manifest()
+
+    def get_stats(self):
+        return {
+            "segment": self.current["name"],
+            "segments": len(self.segments),
+            "rotations": self.rotations,
+            "deleted": self.deleted,
+        }
+
+    def close(self):
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self.current["end_ns"] = time.time_ns()
+            self._enforce_retention()
+            self._write_manifest()
+
+
+def configure_storage(**kwargs):
+    unknown = set(kwargs) - set(STORAGE_DEFAULTS)
+    if unknown:
+        raise ValueError(f"Unknown storage settings: {', '.join(sorted(unknown))}")
+    STORAGE_DEFAULTS.update(kwargs)
+
+
+def get_segment_manager(path):
+    # None unless rotation or retention is configured; the DB and pcap of one capture share a manager.
+    if not any(STORAGE_DEFAULTS.values()):
+        return None
+    key = os.path.splitext(os.path.abspath(path))[0]
+    with _managers_lock:
+        manager = _managers.get(key)
+        if manager is None:
+            manager = _managers[key] = SegmentManager(path, **STORAGE_DEFAULTS)
+            atexit.register(manager.close)
+            register_source(f"storage:{key}", manager.get_stats)
+        return manager
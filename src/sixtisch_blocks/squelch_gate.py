@@ -0,0 +1,122 @@
+from gnuradio import gr
+import numpy as np
+import pmt
+from .decoder import StreamClock, get_stream_clock
+
+TAG_INTERVAL_S = 0.1
+MIN_GAP_S = 0.001
+
+
+class SquelchGate(gr.basic_block):
+    # Power squelch (per sample, like pwr_squelch_cc with alpha 1) that keeps frame times tied to the
+    # sample count. The first sample after every dropped stretch, and one sample every TAG_INTERVAL_S,
+    # carries an rx_time tag computed from its input sample index; the segmenter re-anchors its bit
+    # clock on these, so neither dropped samples nor a clock recovery running off the nominal bitrate
+    # shift the timestamps. With gate=False quiet samples are zeroed instead of dropped.
+    # schedule(start_ns, end_ns) may return the time spans to receive (None = everything); samples
+    # outside them are dropped as well.
+    def __init__(self, samp_rate, threshold_db=-30, gate=True, time_base="", schedule=None):
+        gr.basic_block.__init__(self, name="Squelch Gate", in_sig=[np.complex64], out_sig=[np.complex64])
+        self.samp_rate = int(samp_rate)
+        self.threshold = 10 ** (threshold_db / 10)
+        self.gate = bool(gate)
+        self.clock = get_stream_clock(time_base) if time_base else StreamClock()
+        self.schedule = schedule
+        self.tag_interval = max(1, round(TAG_INTERVAL_S * samp_rate))
+        self.min_gap = max(1, round(MIN_GAP_S * samp_rate))
+        self.rx_time_key = pmt.intern("rx_time")
+        self.zero_ns = None
+        self.passing = False
+        self.samples = 0
+        self.passed = 0
+        self.resumes = 0
+        self.set_tag_propagation_policy(gr.TPP_DONT)
+
+    def forecast(self, noutput_items, ninputs):
+        return [noutput_items] * ninputs
+
+    def set_schedule(self, schedule):
+        self.schedule = schedule
+
+    def get_stats(self):
+        return {"samples": self.samples, "passed": self.passed, "resumes": self.resumes}
+
+    def _time_ns(self, index):
+        return self.zero_ns + index * 1_000_000_000 // self.samp_rate
+
+    def _index(self, time_ns):
+        return -((self.zero_ns - time_ns) * self.samp_rate // 1_000_000_000)
+
+    def _update_zero(self, first, n):
+        tags = self.get_tags_in_window(0, 0, n, self.rx_time_key)
+        if tags:
+            secs, frac = pmt.to_python(tags[-1].value)
+            self.zero_ns = (int(secs) * 1_000_000_000 + round(frac * 1e9)
+                            - tags[-1].offset * 1_000_000_000 // self.samp_rate)
+        elif self.zero_ns is None:
+            self.zero_ns = self.clock.zero_ns(first + n, self.samp_rate)
+
+    def _fill_gaps(self, loud):
+        # Quiet stretches shorter than min_gap between loud samples are kept, so envelope dips inside
+        # a frame do not split it into separately tagged pieces.
+        edges = np.diff(np.concatenate(([self.passing], loud, [True])).astype(np.int8))
+        falls = np.flatnonzero(edges == -1)
+        rises = np.flatnonzero(edges == 1)
+        rises = rises[len(rises) - len(falls):]
+        short = rises - falls < self.min_gap
+        if not short.any():
+            return loud
+        marks = np.zeros(len(loud) + 1, dtype=np.int32)
+        np.add.at(marks, falls[short], 1)
+        np.add.at(marks, rises[short], -1)
+        return loud | (np.cumsum(marks[:-1]) > 0)
+
+    def _scheduled(self, first, n):
+        spans = self.schedule(self._time_ns(first), self._time_ns(first + n))
+        if spans is None:
+            return None
+        keep = np.zeros(n, dtype=bool)
+        for start_ns, end_ns in spans:
+            keep[max(0, self._index(start_ns) - first):max(0, self._index(end_ns) - first)] = True
+        return keep
+
+    def general_work(self, input_items, output_items):
+        in0 = input_items[0]
+        out = output_items[0]
+        n = min(len(in0), len(out))
+        if n == 0:
+            return 0
+        first = self.nitems_read(0)
+        self._update_zero(first, n)
+        x = in0[:n]
+        loud = (x.real * x.real + x.imag * x.imag) >= self.threshold
+        if self.gate:
+            keep = self._fill_gaps(loud)
+        else:
+            x = np.where(loud, x, 0)
+            keep = np.ones(n, dtype=bool)
+        if self.schedule is not None:
+            scheduled = self._scheduled(first, n)
+            if scheduled is not None:
+                keep &= scheduled
+        kept = x[keep]
+        m = len(kept)
+        out[:m] = kept
+
+        resumed = keep & ~np.concatenate(([self.passing], keep[:-1]))
+        marks = resumed.copy()
+        periodic = np.arange((-first) % self.tag_interval, n, self.tag_interval)
+        marks[periodic] |= keep[periodic]
+        positions = np.flatnonzero(marks)
+        if len(positions):
+            out_index = self.nitems_written(0) + np.cumsum(keep)[positions] - 1
+            for pos, index in zip(positions, out_index):
+                secs, nsec = divmod(self._time_ns(first + int(pos)), 1_000_000_000)
+                self.add_item_tag(0, int(index), self.rx_time_key,
+                                  pmt.make_tuple(pmt.from_uint64(secs), pmt.from_double(nsec / 1e9)))
+        self.passing = bool(keep[-1])
+        self.samples += n
+        self.passed += m
+        self.resumes += int(resumed.sum())
+        self.consume(0, n)
+        return m
@@ -0,0 +1,139 @@
+import json
+import os
+import sys
+import threading
+import time
+from bisect import bisect_left
+
+_sources = {}
+_sources_lock = threading.Lock()
+
+
+class Histogram:
+    # Log-spaced buckets, four per octave, from 1 unit up to 2**32 units.
+    EDGES = [2 ** (i / 4) for i in range(4 * 32 + 1)]
+
+    def __init__(self):
+        self.counts = [0] * (len(self.EDGES) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, value):
+        self.counts[bisect_left(self.EDGES, value)] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def percentile(self, p):
+        if self.count == 0:
+            return 0.0
+        target = p / 100 * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= target:
+                return min(self.EDGES[i] if i < len(self.EDGES) else self.max, self.max)
+        return self.max
+
+    def to_dict(self):
+        return {
+            "count": self.count,
+            "mean": self.total / self.count if self.count else 0.0,
+            "p50": self.percentile(50),
+            "p90": self.percentile(90),
+            "p99": self.percentile(99),
+            "max": self.max,
+        }
+
+
+class SegmenterStats:
+    def __init__(self):
+        self.work_calls = 0
+        self.bits_consumed = 0
+        self.sync_hits = 0
+        self.phr_rejects = 0
+        self.superseded = 0
+        self.frames = 0
+        self.crc_pass = 0
+        self.crc_fail = 0
+        self.carry_bits = 0
+        self.duplicates = 0
+        self.retransmissions = 0
+        self.suppressed = 0
+        self.work_latency_us = Histogram()
+
+    def to_dict(self):
+        return {
+            "work_calls": self.work_calls,
+            "bits_consumed": self.bits_consumed,
+            "sync_hits": self.sync_hits,
+            "false_syncs": self.phr_rejects + self.superseded + self.crc_fail,
+            "phr_rejects": self.phr_rejects,
+            "superseded": self.superseded,
+            "frames": self.frames,
+            "crc_pass": self.crc_pass,
+            "crc_fail": self.crc_fail,
+            "carry_bits": self.carry_bits,
+            "duplicates": self.duplicates,
+            "retransmissions": self.retransmissions,
+            "suppressed": self.suppressed,
+            "work_latency_us": self.work_latency_us.to_dict(),
+        }
+
+
+def register_source(name, provider):
+    with _sources_lock:
+        _sources[name] = provider
+
+
+def dump_stats():
+    with _sources_lock:
+        sources = list(_sources.items())
+    return {"time": time.time(), **{name: provider() for name, provider in sources}}
+
+
+def _format(d, indent=0):
+    lines = []
+    for key, value in d.items():
+        if isinstance(value, dict):
+            lines.append(" " * indent + f"{key}:")
+            lines.extend(_format(value, indent + 2))
+        elif isinstance(value, float):
+            lines.append(" " * indent + f"{key}: {value:.3f}")
+        else:
+            lines.append(" " * indent + f"{key}: {value}")
+    return lines
+
+
+def format_stats(stats=None):
+    return "\n".join(_format(stats if stats is not None else dump_stats()))
+
+
+def write_stats(path, stats=None):
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(stats if stats is not None else dump_stats(), f, indent=2)
+    os.replace(tmp, path)
+
+
+class StatsReporter:
+    def __init__(self, path, interval=5.0):
+        self.path = path
+        self.interval = float(interval)
+        self._stop = threading.Event()
+        self.thread = threading.Thread(target=self._run, name="stats", daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                write_stats(self.path)
+            except OSError as exc:
+                print(f"Stats: cannot write {self.path}: {exc}", file=sys.stderr)
+
+    def close(self):
+        self._stop.set()
+        self.thread.join()
+        write_stats(self.path)
@@ -0,0 +1,145 @@
+import time
+from .dedup import FIRST, COPY_NAMES
+from .frame_parser import FRAME_TYPE_NAMES, ADDR_MODE_NAMES
+
+SCHEMAS = {
+    "text": '''
+                Timestamp_ns INTEGER,
+                SFD TEXT,
+                PHR TEXT,
+                FrameType TEXT,
+                AckRequest INTEGER,
+                DestAddrMode TEXT,
+                SrcAddrMode TEXT,
+                SeqNum TEXT,
+                PAN_ID TEXT,
+                DestAddr TEXT,
+                SrcAddr TEXT,
+                PSDU TEXT,
+                CRC_16 TEXT,
+                CRC_Check INTEGER,
+                PacketDuration_ms REAL,
+                Copy TEXT
+    ''',
+    "compact": '''
+                Timestamp_ns INTEGER,
+                SFD INTEGER,
+                PHR INTEGER,
+                FrameType INTEGER,
+                AckRequest INTEGER,
+                DestAddrMode INTEGER,
+                SrcAddrMode INTEGER,
+                SeqNum INTEGER,
+                PAN_ID INTEGER,
+                DestAddr BLOB,
+                SrcAddr BLOB,
+                PSDU BLOB,
+                CRC_16 INTEGER,
+                CRC_Check INTEGER,
+                PacketDuration_ms REAL,
+                Copy INTEGER
+    ''',
+}
+
+
+def table_name(channel):
+    return "packets_" + "".join(c if c.isalnum() or c == "_" else "_" for c in str(channel))
+
+
+def insert_sql(table):
+    return f"INSERT INTO {table} VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?)"
+
+
+def schema_columns(schema):
+    return [tuple(line.strip().rstrip(",").split()) for line in SCHEMAS[schema].strip().splitlines()]
+
+
+def init_table(db, table, schema):
+    if schema not in SCHEMAS:
+        raise ValueError(f"Unknown schema: {schema}")
+
+    def create(conn):
+        existing = [(name, col_type.upper()) for _, name, col_type, *_ in conn.execute(f'PRAGMA table_info({table})')]
+        if existing and existing != schema_columns(schema):
+            # Rows from an older layout are kept under a new name instead of being dropped.
+            stamp = int(time.time())
+            while conn.execute("SELECT 1 FROM sqlite_master WHERE name = ?", (f"{table}_{stamp}",)).fetchone():
+                stamp += 1
+            conn.execute(f'ALTER TABLE {table} RENAME TO {table}_{stamp}')
+        conn.execute(f'CREATE TABLE IF NOT EXISTS {table} ({SCHEMAS[schema]})')
+        if schema == "compact":
+            for enum_table, names in (("enum_FrameType", FRAME_TYPE_NAMES), ("enum_AddrMode", ADDR_MODE_NAMES),
+                                      ("enum_Copy", COPY_NAMES)):
+                conn.execute(f'CREATE TABLE IF NOT EXISTS {enum_table} (Code INTEGER PRIMARY KEY, Name TEXT)')
+                conn.executemany(f'INSERT OR REPLACE INTO {enum_table} VALUES (?, ?)', names.items())
+
+    db.put(create, block=True)
+
+
+def write_summary(db, channel, total_packets, total_time_s):
+    # Runs appending to the same database add to the totals of the earlier ones.
+    db.put('''
+        CREATE TABLE IF NOT EXISTS sniff_summary (
+            Channel TEXT PRIMARY KEY,
+            TotalPackets INTEGER,
+            TotalTime_s REAL
+        )
+    ''', block=True)
+    db.put('''
+        INSERT INTO sniff_summary (Channel, TotalPackets, TotalTime_s)
+        VALUES (?, ?, ?)
+        ON CONFLICT(Channel) DO UPDATE SET
+            TotalPackets=TotalPackets+excluded.TotalPackets,
+            TotalTime_s=TotalTime_s+excluded.TotalTime_s
+    ''', (channel, total_packets, total_time_s), block=True)
+
+
+def text_row(record, packet_duration_ms, sfd_width=4, copy=FIRST):
+    frame_type = ack = dest_addr_str = src_addr_str = ""
+    if record.frame_type is not None:
+        frame_type = FRAME_TYPE_NAMES.get(record.frame_type, "Unknown")
+        ack = record.ack_request
+        dest_addr_str = ADDR_MODE_NAMES.get(record.dest_mode, "Unknown")
+        src_addr_str = ADDR_MODE_NAMES.get(record.src_mode, "Unknown")
+    return (
+        record.time_ns,
+        f"{record.sfd:0{sfd_width}X}",
+        f"{record.phr:02X}",
+        frame_type,
+        ack,
+        dest_addr_str,
+        src_addr_str,
+        record.seq.hex().upper(),
+        record.pan_id.hex().upper(),
+        record.dest_addr.hex().upper(),
+        record.src_addr.hex().upper(),
+        record.payload.hex().upper(),
+        f"{record.crc_rx:04X}",
+        int(record.crc_ok),
+        packet_duration_ms,
+        COPY_NAMES[copy]
+    )
+
+
+def compact_row(record, packet_duration_ms, sfd_width=4, copy=FIRST):
+    return (
+        record.time_ns,
+        record.sfd,
+        record.phr,
+        record.frame_type,
+        record.ack_request,
+        record.dest_mode,
+        record.src_mode,
+        record.seq[0] if record.seq else None,
+        int.from_bytes(record.pan_id, 'big') if len(record.pan_id) == 2 else None,
+        record.dest_addr or None,
+        record.src_addr or None,
+        record.payload,
+        record.crc_rx,
+        int(record.crc_ok),
+        packet_duration_ms,
+        copy
+    )
+
+
+ROW_BUILDERS = {"text": text_row, "compact": compact_row}
@@ -0,0 +1,173 @@
+import threading
+from collections import Counter, deque
+from .ie_parser import parse_tsch_ies
+
+DEFAULT_SLOT_DURATION_US = 10_000
+DEFAULT_TX_OFFSET_US = 2_120
+MAX_SEQUENCE_LEN = 16
+
+
+class ChannelTracker:
+    # Follows the TSCH schedule from Enhanced Beacons: the sync IE anchors the ASN to a time, the
+    # slotframe & link IE gives advertised cells and cells with min_cell_frames frames are added. The channel
+    # of cell (ASN, offset) is hopping_sequence[(ASN + offset) % len(hopping_sequence)], with channels
+    # numbered like the receiver's channel plan. Without a configured sequence it is taken from the
+    # Channel Hopping IE, whose 802.15.4 channel numbers channel_index maps onto the plan, or inferred
+    # from the channels EBs (channel offset 0) were heard on. All times are in the receiver's stream
+    # time base: frames are placed in slots by their time_ns (start of the SFD, from the sample count,
+    # so without decoding latency) and predictions are asked for the time of the samples being gated.
+    def __init__(self, n_channels, hopping_sequence=None, slot_duration_us=None, tx_offset_us=DEFAULT_TX_OFFSET_US,
+                 guard_slots=1, min_cell_frames=3, explore_every=8, sync_timeout_s=60.0, channel_index=None):
+        self.n_channels = n_channels
+        self.fixed_sequence = list(hopping_sequence) if hopping_sequence else None
+        self.hopping_sequence = self.fixed_sequence
+        self.slot_duration_ns = (slot_duration_us or DEFAULT_SLOT_DURATION_US) * 1000
+        self.tx_offset_ns = tx_offset_us * 1000
+        self.guard_slots = guard_slots
+        self.min_cell_frames = min_cell_frames
+        self.explore_every = explore_every
+        self.sync_timeout_ns = sync_timeout_s * 1e9
+        self.channel_index = channel_index
+        self.anchor_asn = None
+        self.anchor_ns = 0
+        self.last_sync_ns = 0
+        self.slotframe_size = 1
+        self.links = set()
+        self.learned = set()
+        self.cell_frames = Counter()
+        self.beacons = deque(maxlen=64)
+        self.eb_count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, channel, record):
+        if not record.crc_ok or record.frame_type is None:
+            return
+        time_ns = record.time_ns
+        with self._lock:
+            if record.frame_type == 0:
+                info = parse_tsch_ies(record.payload)
+                if info is not None:
+                    self._sync(channel, info, time_ns)
+                    return
+            if self.anchor_asn is not None and self.hopping_sequence and channel in self.hopping_sequence:
+                asn = self._frame_asn(time_ns)
+                cell = (asn % self.slotframe_size, (self.hopping_sequence.index(channel) - asn) % len(self.hopping_sequence))
+                self.cell_frames[cell] += 1
+                if self.cell_frames[cell] == self.min_cell_frames:
+                    self.learned.add(cell)
+
+    def _sync(self, channel, info, time_ns):
+        self.eb_count += 1
+        if info.timeslot_length_us:
+            self.slot_duration_ns = info.timeslot_length_us * 1000
+        if info.tx_offset_us is not None:
+            self.tx_offset_ns = info.tx_offset_us * 1000
+        self.anchor_asn = info.asn
+        self.anchor_ns = time_ns - self.tx_offset_ns
+        self.last_sync_ns = time_ns
+        if info.slotframes:
+            slotframe = info.slotframes[0]
+            if slotframe.size != self.slotframe_size:
+                self.slotframe_size = max(1, slotframe.size)
+                self.links = set()
+                self._forget_cells()
+            self.links.update((link.timeslot % self.slotframe_size, link.channel_offset) for link in slotframe.links)
+        if self.fixed_sequence is None:
+            self.beacons.append((info.asn, channel))
+            sequence = self._map_sequence(info.hopping_sequence) or self._fit_sequence()
+            if sequence != self.hopping_sequence:
+                self.hopping_sequence = sequence
+                self._forget_cells()
+
+    def _forget_cells(self):
+        self.learned = set()
+        self.cell_frames.clear()
+
+    def _map_sequence(self, numbers):
+        # Channels outside the plan stay in the sequence as None so the hop positions still line up;
+        # a sequence without any received channel, or with no way to map it, is ignored.
+        if not numbers or self.channel_index is None:
+            return None
+        sequence = [self.channel_index(number) for number in numbers]
+        return sequence if any(ch is not None for ch in sequence) else None
+
+    def _fit_sequence(self):
+        # Shortest sequence that explains every EB, once each position has been seen about twice.
+        for length in range(1, MAX_SEQUENCE_LEN + 1):
+            if len(self.beacons) < 2 * length:
+                break
+            sequence = {}
+            if all(sequence.setdefault(asn % length, channel) == channel for asn, channel in self.beacons):
+                if len(sequence) == length:
+                    return [sequence[i] for i in range(length)]
+        return None
+
+    def _asn_at(self, time_ns):
+        return self.anchor_asn + int((time_ns - self.anchor_ns) // self.slot_duration_ns)
+
+    def _frame_asn(self, time_ns):
+        # Frames start tx_offset into their slot, so round instead of truncating to absorb jitter.
+        return self.anchor_asn + round((time_ns - self.anchor_ns - self.tx_offset_ns) / self.slot_duration_ns)
+
+    def _synced(self, time_ns):
+        return (self.anchor_asn is not None and bool(self.hopping_sequence)
+                and time_ns - self.last_sync_ns <= self.sync_timeout_ns)
+
+    def asn_at(self, time_ns):
+        with self._lock:
+            if self.anchor_asn is None:
+                return None
+            return self._asn_at(time_ns)
+
+    def channel_at(self, asn, channel_offset=0):
+        sequence = self.hopping_sequence
+        return sequence[(asn + channel_offset) % len(sequence)] if sequence else None
+
+    def active_channels(self, time_ns):
+        # Channels of the known cells around time_ns, or None when every channel should be received:
+        # before sync, after losing it, and during every explore_every-th slotframe so that cells
+        # nobody advertised are still picked up.
+        with self._lock:
+            if not self._synced(time_ns):
+                return None
+            asn = self._asn_at(time_ns)
+            if self.explore_every and (asn // self.slotframe_size) % self.explore_every == 0:
+                return None
+            sequence = self.hopping_sequence
+            channels = set()
+            slots = {a % self.slotframe_size: a for a in range(asn - self.guard_slots, asn + self.guard_slots + 1)}
+            for slot, offset in self.links | self.learned:
+                if slot in slots:
+                    channels.add(sequence[(slots[slot] + offset) % len(sequence)])
+            return {ch for ch in channels if ch is not None and 0 <= ch < self.n_channels}
+
+    def receive_spans(self, channel, start_ns, end_ns):
+        # Spans of [start_ns, end_ns) in which channel should be received, slot by slot, or None when
+        # that is all of it.
+        spans = []
+        t = start_ns
+        while t < end_ns:
+            active = self.active_channels(t)
+            next_ns = end_ns
+            if active is not None:
+                with self._lock:
+                    next_ns = self.anchor_ns + (self._asn_at(t) + 1 - self.anchor_asn) * self.slot_duration_ns
+            if active is None or channel in active:
+                if spans and spans[-1][1] == t:
+                    spans[-1] = (spans[-1][0], min(next_ns, end_ns))
+                else:
+                    spans.append((t, min(next_ns, end_ns)))
+            t = max(next_ns, t + 1)
+        return None if spans == [(start_ns, end_ns)] else spans
+
+    def get_stats(self):
+        with self._lock:
+            return {
+                "ebs": self.eb_count,
+                "asn": self.anchor_asn,
+                "hopping_sequence": list(self.hopping_sequence or []),
+                "slotframe_size": self.slotframe_size,
+                "cells": len(self.links | self.learned),
+                "slot_duration_ms": self.slot_duration_ns / 1e6,
+            }
+
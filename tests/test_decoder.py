@@ -0,0 +1,90 @@
+import numpy as np
+import pytest
+from frame_generator import make_stream, to_bits, make_frame, make_psdu
+from sixtisch_blocks.crc import crc16
+from sixtisch_blocks.decoder import FrameDecoder, decode_bits
+
+
+def _search(stream, chunk_size, **kwargs):
+    decoder = FrameDecoder(**kwargs)
+    frames = []
+    for start in range(0, len(stream), chunk_size):
+        frames.extend((sfd, bytes(frame), bit_offset) for sfd, frame, bit_offset, _ in decoder.search(stream[start:start+chunk_size]))
+    return frames
+
+
+def _crc_ok(frame):
+    return crc16(frame[:-2]) == int.from_bytes(frame[-2:], 'big')
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 64, 1000, 4096, None])
+def test_chunk_size_invariance(chunk_size):
+    stream, _ = make_stream(20, false_sync_rate=0.3, ber=1e-3, seed=3)
+    reference = _search(stream, len(stream))
+    assert _search(stream, chunk_size or len(stream)) == reference
+
+
+def test_recovers_every_frame_with_false_syncs():
+    stream, frames = make_stream(300, false_sync_rate=0.5, seed=4)
+    decoded = _search(stream, 4096)
+    assert [frame for _, frame, _ in decoded if _crc_ok(frame)] == [frame[2:] for frame in frames]
+
+
+def test_back_to_back_frames():
+    stream, frames = make_stream(50, density=1.0, seed=5)
+    assert [frame for _, frame, _ in _search(stream, 4096) if _crc_ok(frame)] == [frame[2:] for frame in frames]
+
+
+def test_packed_input_matches_unpacked():
+    stream, frames = make_stream(100, false_sync_rate=0.3, seed=6)
+    stream = stream[:len(stream) - len(stream) % 8]
+    unpacked = _search(stream, 4096)
+    packed = _search(np.packbits(stream), 512, packed_input=True)
+    assert packed == unpacked
+    assert [frame for _, frame, _ in unpacked if _crc_ok(frame)] == [frame[2:] for frame in frames]
+
+
+def test_noise_bounds():
+    clean, frames = make_stream(300, false_sync_rate=0.3, seed=7)
+    noisy, _ = make_stream(300, false_sync_rate=0.3, ber=5e-4, seed=7)
+    errors = np.flatnonzero(clean != noisy)
+    assert len(errors)
+    generated = {frame[2:] for frame in frames}
+    recovered = {frame for _, frame, _ in _search(noisy, 4096) if _crc_ok(frame)}
+    # Whatever passes the CRC was transmitted, and every frame the noise missed is recovered.
+    assert recovered <= generated
+    for _, frame, bit_offset in _search(clean, 4096):
+        if not np.any((errors >= bit_offset) & (errors < bit_offset + 16 + 8 * len(frame))):
+            assert frame in recovered
+    assert len(recovered) < len(frames)
+
+
+def test_decode_bits_matches_feed():
+    stream, frames = make_stream(40, false_sync_rate=0.3, seed=8)
+    records = [r for r in decode_bits(stream, chunk_size=333) if r.crc_ok]
+    assert [r.payload for r in records] == [frame[3:-2] for frame in frames]
+    decoder = FrameDecoder()
+    feed = [r for start in range(0, len(stream), 4096) for r in decoder.feed(stream[start:start+4096])]
+    assert [(r.bit_offset, r.payload, r.seq) for r in records] == [(r.bit_offset, r.payload, r.seq) for r in feed if r.crc_ok]
+
+
+def test_decode_bits_rejects_bad_crc():
+    rng = np.random.default_rng(9)
+    frame = bytearray(make_frame(make_psdu(rng, payload_len=20)))
+    frame[10] ^= 0x01
+    stream = np.concatenate((rng.integers(0, 2, 100, dtype=np.uint8), to_bits(bytes(frame)),
+                             rng.integers(0, 2, 64, dtype=np.uint8)))
+    records = list(decode_bits(stream))
+    assert len(records) == 1 and not records[0].crc_ok
+
+
+def test_frames_keep_the_anchor_of_their_burst():
+    rng = np.random.default_rng(10)
+    bursts = [np.concatenate((rng.integers(0, 2, 40, dtype=np.uint8), to_bits(make_frame(make_psdu(rng, payload_len=30)))))
+              for _ in range(2)]
+    decoder = FrameDecoder()
+    # Two squelch bursts, the second one starting 5 s after the first.
+    decoder.set_anchor(1_000_000_000, 0)
+    decoder.set_anchor(6_000_000_000, len(bursts[0]))
+    records = [r for r in decoder.feed(np.concatenate(bursts + [np.zeros(64, dtype=np.uint8)])) if r.crc_ok]
+    assert [r.time_ns for r in records] == [1_000_000_000 + 40 * 20_000, 6_000_000_000 + 40 * 20_000]
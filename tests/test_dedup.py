@@ -0,0 +1,43 @@
+import itertools
+import numpy as np
+from frame_generator import make_frame, make_psdu, to_bits
+from sixtisch_blocks.decoder import FrameDecoder, StreamClock
+from sixtisch_blocks.dedup import FrameCorrelator, FIRST, DUPLICATE, RETRANSMISSION
+
+
+def _fake_now(step_ns):
+    # Every call is step_ns later, like segmenters whose first work() runs at different times.
+    ticks = itertools.count()
+    return lambda: 1_700_000_000_000_000_000 + next(ticks) * step_ns
+
+
+def _channel_streams(seed=1):
+    rng = np.random.default_rng(seed)
+    bits = to_bits(make_frame(make_psdu(rng, payload_len=40)))
+    lead = rng.integers(0, 2, 5000, dtype=np.uint8)
+    tail = rng.integers(0, 2, 64, dtype=np.uint8)
+    # Same frame at the same channelizer sample on both channels, with different noise around it.
+    a = np.concatenate((lead, bits, tail))
+    b = np.concatenate((rng.integers(0, 2, len(lead), dtype=np.uint8), bits, tail))
+    return a, b
+
+
+def _classify(clock_a, clock_b):
+    a, b = _channel_streams()
+    dec_a, dec_b = FrameDecoder(clock=clock_a), FrameDecoder(clock=clock_b)
+    # Channel B starts late and is fed in differently sized chunks.
+    rec_a = [r for start in range(0, len(a), 4096) for r in dec_a.feed(a[start:start+4096]) if r.crc_ok]
+    rec_b = [r for start in range(0, len(b), 1000) for r in dec_b.feed(b[start:start+1000]) if r.crc_ok]
+    assert len(rec_a) == len(rec_b) == 1
+    correlator = FrameCorrelator()
+    return correlator.classify("a", rec_a[0]), correlator.classify("b", rec_b[0])
+
+
+def test_same_frame_on_two_channels_is_duplicate():
+    clock = StreamClock(now=_fake_now(50_000_000))
+    assert _classify(clock, clock) == (FIRST, DUPLICATE)
+
+
+def test_separate_clocks_drift_apart():
+    now = _fake_now(50_000_000)
+    assert _classify(StreamClock(now=now), StreamClock(now=now)) == (FIRST, RETRANSMISSION)
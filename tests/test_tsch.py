@@ -0,0 +1,33 @@
+from sixtisch_blocks.tsch import ChannelTracker
+
+SLOT_NS = 10_000_000
+
+
+def _tracker():
+    # Synced at ASN 0 on a 4-slot slotframe with one link in slot 1, hopping over channels 0..3.
+    tracker = ChannelTracker(4, hopping_sequence=[0, 1, 2, 3], guard_slots=0, explore_every=0)
+    tracker.anchor_asn = 0
+    tracker.anchor_ns = 0
+    tracker.last_sync_ns = 0
+    tracker.slotframe_size = 4
+    tracker.links = {(1, 0)}
+    return tracker
+
+
+def test_receive_spans_cover_only_the_predicted_slots():
+    tracker = _tracker()
+    # Slot 1 hops to channel 1, slot 5 to channel (5 % 4) = 1 as well.
+    assert tracker.receive_spans(1, 0, 8 * SLOT_NS) == [(SLOT_NS, 2 * SLOT_NS), (5 * SLOT_NS, 6 * SLOT_NS)]
+    assert tracker.receive_spans(2, 0, 8 * SLOT_NS) == []
+
+
+def test_receive_spans_are_clipped_to_the_requested_range():
+    tracker = _tracker()
+    start, end = SLOT_NS + 1000, SLOT_NS + 5000
+    assert tracker.receive_spans(1, start, end) is None
+    assert tracker.receive_spans(1, SLOT_NS // 2, SLOT_NS + 5000) == [(SLOT_NS, SLOT_NS + 5000)]
+
+
+def test_everything_is_received_before_sync():
+    tracker = ChannelTracker(4, hopping_sequence=[0, 1, 2, 3])
+    assert tracker.receive_spans(2, 0, 8 * SLOT_NS) is None